@@ -0,0 +1,217 @@
+"""
+Headless batch reconciliation of BOB/RICBL statement pairs.
+
+    python -m app.batch statements/ -o results/ --workers 4
+    python -m app.batch pairs.csv -o results/
+
+A directory is scanned for PDFs whose names contain "bob" or "ricb"; the two
+files of a pair share the rest of the name (e.g. thimphu_bob.pdf and
+thimphu_ricb.pdf). A manifest is a CSV with name,bob,ricb columns, with paths
+relative to the manifest. Each pair gets its own output folder with the
+verified matches, flagged matches, split payments, both unmatched sets (as
+CSV, Parquet or one XLSX workbook) and a summary.json. Unmatched RICBL entries
+carry their most similar unmatched BOB row (best_bob_index/_policy/_score).
+
+With --stream, statements are extracted and cleaned one table at a time into
+bob_clean.parquet / ricb_clean.parquet in the pair's folder, so the raw tables
+of a long statement are never held in memory at once; matching then runs on
+the cleaned files.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from app.logic.extractor import extract_tables_from_pdf
+from app.logic.candidates import with_best_counterpart
+from app.logic.cleaner import clean_bob_data, clean_ricb_data
+from app.logic.export import available_formats, export_results
+from app.logic.instrumentation import StageRecorder, use_recorder
+from app.logic.matcher import match_records
+from app.logic.pipeline import read_cleaned, stream_to_parquet
+from app.logic.split_matcher import match_split_payments
+from app.logic.verify_policy_fuzzy import verify_policy_fuzzy
+
+_BANK_TAG = re.compile(r'(?i)[_\-\s.]*(bob|ricbl?)[_\-\s.]*')
+
+def find_pairs(directory: str) -> list:
+    """
+    Pairs up *bob*.pdf and *ricb*.pdf files in a directory by the rest of their name.
+    """
+    sides = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(".pdf"):
+            continue
+        stem = name[:-4]
+        match = _BANK_TAG.search(stem)
+        if not match:
+            continue
+        side = "bob" if match.group(1).lower() == "bob" else "ricb"
+        pair_name = (stem[:match.start()] + "_" + stem[match.end():]).strip("_") or "statement"
+        sides.setdefault(pair_name, {})[side] = os.path.join(directory, name)
+
+    pairs = []
+    for pair_name, files in sorted(sides.items()):
+        if "bob" in files and "ricb" in files:
+            pairs.append({"name": pair_name, "bob": files["bob"], "ricb": files["ricb"]})
+        else:
+            print(f"Skipping {pair_name}: no matching {'RICBL' if 'bob' in files else 'BOB'} statement", file=sys.stderr)
+    return pairs
+
+def read_manifest(path: str) -> list:
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, newline="") as f:
+        return [
+            {
+                "name": row["name"],
+                "bob": os.path.join(base, row["bob"]),
+                "ricb": os.path.join(base, row["ricb"]),
+            }
+            for row in csv.DictReader(f)
+        ]
+
+def _stream_clean(pdf_path: str, kind: str, pair_dir: str, compact: bool):
+    path = os.path.join(pair_dir, f"{kind}_clean.parquet")
+    stream_to_parquet(pdf_path, kind, path)
+    return read_cleaned(path, kind, compact)
+
+def reconcile_pair(pair: dict, output_dir: str, options: dict) -> dict:
+    """
+    Runs extract -> clean -> match -> split payments -> fuzzy-verify for one pair and writes its outputs.
+    """
+    pair_dir = os.path.join(output_dir, pair["name"])
+    os.makedirs(pair_dir, exist_ok=True)
+    summary = {"name": pair["name"], "bob": pair["bob"], "ricb": pair["ricb"]}
+    recorder = StageRecorder()
+
+    try:
+        with use_recorder(recorder):
+            if options["stream"]:
+                bob_df, ricb_df = (
+                    _stream_clean(pair[kind], kind, pair_dir, options["compact"]) for kind in ("bob", "ricb")
+                )
+            else:
+                bob_raw_df = extract_tables_from_pdf(pair["bob"])
+                ricb_raw_df = extract_tables_from_pdf(pair["ricb"])
+                bob_df = clean_bob_data(bob_raw_df, compact=options["compact"])
+                ricb_df = clean_ricb_data(ricb_raw_df, compact=options["compact"])
+            matched, unmatched_bob, unmatched_ricb = match_records(
+                bob_df, ricb_df, options["bob_match_col"], options["ricb_match_col"]
+            )
+            splits = None
+            if options["split"]:
+                splits, unmatched_bob, unmatched_ricb = match_split_payments(
+                    unmatched_bob, unmatched_ricb, options["bob_match_col"], options["ricb_match_col"],
+                    date_window_days=options["split_window"], max_parts=options["max_split_parts"],
+                )
+            unmatched_ricb = with_best_counterpart(
+                unmatched_ricb, unmatched_bob, options["ricb_policy_col"], workers=1,
+            )
+            verified, flagged = verify_policy_fuzzy(
+                matched, options["ricb_policy_col"], options["bob_narration_col"],
+                threshold=options["threshold"], workers=1,
+            )
+
+            results = {"matched": verified, "flagged": flagged}
+            if splits is not None:
+                results["split_payments"] = splits
+            results.update(unmatched_bob=unmatched_bob, unmatched_ricb=unmatched_ricb)
+            export_results(results, pair_dir, options["format"])
+
+        summary.update({
+            "status": "ok",
+            "bob_rows": len(bob_df),
+            "ricb_rows": len(ricb_df),
+            "matched": len(verified),
+            "flagged": len(flagged),
+            "split_payments": int(splits["split_id"].nunique()) if splits is not None else 0,
+            "unmatched_bob": len(unmatched_bob),
+            "unmatched_ricb": len(unmatched_ricb),
+        })
+    except Exception as e:
+        summary.update({"status": "error", "error": str(e), "traceback": traceback.format_exc()})
+
+    summary["stages"] = recorder.records
+    with open(os.path.join(pair_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+def run_batch(pairs: list, output_dir: str, options: dict, workers: int | None = None) -> list:
+    os.makedirs(output_dir, exist_ok=True)
+    if workers == 1 or len(pairs) <= 1:
+        summaries = [reconcile_pair(pair, output_dir, options) for pair in pairs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            summaries = list(executor.map(
+                reconcile_pair, pairs, [output_dir] * len(pairs), [options] * len(pairs)
+            ))
+
+    with open(os.path.join(output_dir, "batch_summary.json"), "w") as f:
+        json.dump(summaries, f, indent=2)
+    return summaries
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="directory of statement PDFs or a CSV manifest (name,bob,ricb)")
+    parser.add_argument("-o", "--output", default="reconciliation_output", help="output directory")
+    parser.add_argument("--workers", type=int, default=None, help="parallel pairs (default: one per CPU)")
+    parser.add_argument("--bob-match-col", default="CREDIT")
+    parser.add_argument("--ricb-match-col", default="AMOUNT")
+    parser.add_argument("--ricb-policy-col", default="POLICY/ ACCOUNT#")
+    parser.add_argument("--bob-narration-col", default="NARRATION")
+    parser.add_argument("--threshold", type=int, default=85, help="fuzzy score needed to verify a match")
+    parser.add_argument("--no-split", action="store_true", help="skip matching one BOB credit to several RICBL entries")
+    parser.add_argument("--split-window", type=int, default=3, help="days between a split credit and its entries")
+    parser.add_argument("--max-split-parts", type=int, default=5, help="most RICBL entries one BOB credit may settle")
+    parser.add_argument("--format", choices=available_formats(), default="csv",
+                        help="one csv/parquet file per result set, or one xlsx workbook with a sheet per set")
+    parser.add_argument("--compact", action="store_true",
+                        help="compact schema: amounts as integer minor units, real dates, categorical text")
+    parser.add_argument("--stream", action="store_true",
+                        help="extract and clean table by table into <kind>_clean.parquet instead of in memory")
+    parser.add_argument("--perf-log", help="also write every stage record as a JSON line to this file")
+    args = parser.parse_args(argv)
+
+    pairs = find_pairs(args.source) if os.path.isdir(args.source) else read_manifest(args.source)
+    if not pairs:
+        print("No BOB/RICBL statement pairs found.", file=sys.stderr)
+        return 1
+
+    options = {
+        "bob_match_col": args.bob_match_col,
+        "ricb_match_col": args.ricb_match_col,
+        "ricb_policy_col": args.ricb_policy_col,
+        "bob_narration_col": args.bob_narration_col,
+        "threshold": args.threshold,
+        "split": not args.no_split,
+        "split_window": args.split_window,
+        "max_split_parts": args.max_split_parts,
+        "format": args.format,
+        "compact": args.compact,
+        "stream": args.stream,
+    }
+    summaries = run_batch(pairs, args.output, options, workers=args.workers)
+
+    if args.perf_log:
+        with open(args.perf_log, "a") as f:
+            for summary in summaries:
+                for record in summary["stages"]:
+                    f.write(json.dumps({"pair": summary["name"], **record}, default=str) + "\n")
+
+    failed = 0
+    for summary in summaries:
+        if summary["status"] == "ok":
+            print(f"{summary['name']}: {summary['matched']} matched, {summary['flagged']} flagged, "
+                  f"{summary['split_payments']} split payments, "
+                  f"{summary['unmatched_bob']} unmatched BOB, {summary['unmatched_ricb']} unmatched RICBL")
+        else:
+            failed += 1
+            print(f"{summary['name']}: failed - {summary['error']}", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
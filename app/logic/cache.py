@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.logic.extractor import EXTRACTOR_VERSION, _pdf_source, extract_tables_from_pdf
+from app.logic.cleaner import CLEANER_VERSION
+from app.logic.instrumentation import instrumented
+
+DEFAULT_CACHE_DIR = os.getenv("RECON_CACHE_DIR", os.path.join(".cache", "recon"))
+DEFAULT_MAX_BYTES = int(os.getenv("RECON_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+# Parquet wants unique string column names; pdfplumber headers can be None or repeated
+_COLUMNS_META_KEY = b"recon_columns"
+
+def pdf_digest(uploaded_file) -> str:
+    """
+    SHA-256 of the PDF bytes, used as the content address for cached tables.
+    """
+    source = _pdf_source(uploaded_file)
+    digest = hashlib.sha256()
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    else:
+        digest.update(source)
+    return digest.hexdigest()
+
+def _write_parquet(df: pd.DataFrame, path: str):
+    positional = df.copy(deep=False)
+    positional.columns = [str(i) for i in range(len(df.columns))]
+    table = pa.Table.from_pandas(positional, preserve_index=True)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_COLUMNS_META_KEY] = json.dumps(list(df.columns)).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Write next to the target and rename, so readers never see a half-written file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def _read_parquet(path: str) -> pd.DataFrame:
+    table = pq.read_table(path)
+    df = table.to_pandas()
+    df.columns = json.loads(table.schema.metadata[_COLUMNS_META_KEY])
+    return df
+
+class StatementCache:
+    """
+    On-disk cache of raw and cleaned statement tables, stored as Parquet.
+
+    Entries are keyed by the PDF's SHA-256 plus the extractor/cleaner versions,
+    and the least recently used files are evicted once the directory grows past
+    max_bytes.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def raw_key(self, digest: str) -> str:
+        return f"{digest}-x{EXTRACTOR_VERSION}-raw"
+
+    def clean_key(self, digest: str, cleaner, compact: bool = False) -> str:
+        key = f"{digest}-x{EXTRACTOR_VERSION}-c{CLEANER_VERSION}-{cleaner.__name__}"
+        return f"{key}-compact" if compact else key
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        path = self._path(key)
+        try:
+            df = _read_parquet(path)
+        except (FileNotFoundError, OSError, pa.ArrowException, KeyError, ValueError):
+            return None
+        # Touch the file so eviction sees it as recently used
+        os.utime(path)
+        return df
+
+    def put(self, key: str, df: pd.DataFrame):
+        _write_parquet(df, self._path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".parquet"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    @instrumented("load_raw")
+    def load_raw(self, uploaded_file, digest: str | None = None, workers: int | None = 1) -> pd.DataFrame:
+        """
+        Returns the extracted tables for a PDF, extracting and caching them on a miss.
+        """
+        digest = digest or pdf_digest(uploaded_file)
+        key = self.raw_key(digest)
+        df = self.get(key)
+        if df is None:
+            df = extract_tables_from_pdf(uploaded_file, workers=workers)
+            self.put(key, df)
+        return df
+
+    @instrumented("load_clean")
+    def load_clean(self, uploaded_file, cleaner, digest: str | None = None, workers: int | None = 1,
+                   compact: bool = False) -> pd.DataFrame:
+        """
+        Returns cleaner(raw tables) for a PDF, going through the raw cache on a miss.
+        """
+        digest = digest or pdf_digest(uploaded_file)
+        key = self.clean_key(digest, cleaner, compact)
+        df = self.get(key)
+        if df is None:
+            raw_df = self.load_raw(uploaded_file, digest=digest, workers=workers)
+            df = cleaner(raw_df.copy(), compact=True) if compact else cleaner(raw_df.copy())
+            self.put(key, df)
+        return df
@@ -1,21 +1,49 @@
+import numpy as np
 import pandas as pd
 import re
 
+from app.logic.instrumentation import instrumented
+from app.logic.schema import compact_frame, to_minor_units
+
+# Bump whenever a change alters the cleaned output, so cached results are not reused
+CLEANER_VERSION = 1
+
+POLICY_PATTERN = re.compile(r'([A-Z]{2,}[A-Z0-9]*/\d{4}/[\dA-Z]+(?:/\d+)*)')
+
 def extract_policy_id(narration: str) -> str:
     if not isinstance(narration, str):
         return None
 
-    pattern = r'[A-Z]{2,}[A-Z0-9]*/\d{4}/[\dA-Z]+(?:/\d+)*'
-    match = re.search(pattern, narration)
+    match = POLICY_PATTERN.search(narration)
     if match:
         return match.group(0).strip()
     return None
 
+def extract_policy_ids(narrations: pd.Series) -> pd.Series:
+    """
+    Vectorized extract_policy_id over a whole column; non-matches come back as NaN.
+    """
+    if not (pd.api.types.is_object_dtype(narrations) or pd.api.types.is_string_dtype(narrations)):
+        return narrations.apply(extract_policy_id)
+    return narrations.str.extract(POLICY_PATTERN, expand=False)
+
+def _blank_columns(df: pd.DataFrame) -> np.ndarray:
+    # Exact '' / '-' cells are found for the whole frame in one hashed pass. Only
+    # columns whose first other cell is padded whitespace need stripping.
+    blank = df.isin(['', '-']).to_numpy()
+    result = blank.all(axis=0)
+    for i in np.flatnonzero(~result):
+        rest = df.iloc[:, i][~blank[:, i]]
+        first = rest.iloc[0]
+        if isinstance(first, str) and first.strip() in ('', '-'):
+            result[i] = rest.astype(str).str.strip().isin(['', '-']).all()
+    return result
+
 def drop_useless_columns(df: pd.DataFrame) -> pd.DataFrame:
     df.columns = [str(col).strip() for col in df.columns]
     df = df.loc[:, ~df.columns.str.match(r'^(Unnamed.*|None|nan|\s*)$', case=False)]
     df = df.dropna(axis=1, how='all')
-    df = df.loc[:, ~df.apply(lambda col: col.astype(str).str.strip().replace('-', '').eq('').all())]
+    df = df.loc[:, ~_blank_columns(df)]
     return df
 
 def normalize(col: str) -> str:
@@ -29,49 +57,109 @@ def normalize(col: str) -> str:
         .replace("  ", " ")
     )
 
-def clean_bob_data(df: pd.DataFrame) -> pd.DataFrame:
-    df = drop_useless_columns(df)
+def _parse_amount(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    text = series.str.replace(",", "", regex=False).str.strip()
+    return text.where(text != "").astype(float)
+
+def _bob_drop_columns(columns) -> list:
     columns_to_drop = ['TRAN DESC', 'DEBIT', 'BALANCE', 'TOTAL']
-    normalized_cols = {col: normalize(col) for col in df.columns}
-    drop_cols = [col for col, norm in normalized_cols.items() if norm in columns_to_drop]
-    df = df.drop(columns=drop_cols, errors='ignore')
+    normalized_cols = {col: normalize(col) for col in columns}
+    return [col for col, norm in normalized_cols.items() if norm in columns_to_drop]
+
+def _ricb_drop_columns(columns) -> list:
+    fuzzy_keys = ['TRANSACTION STATUS', 'DEPARTMENT', 'ERR LOG', 'JOURNAL NO']
+    normalized_cols = {col: normalize(col) for col in columns}
+    return [col for col, norm in normalized_cols.items() if norm in fuzzy_keys]
+
+def _ricb_date_column(columns):
+    for col in columns:
+        if "DATE" in normalize(col):
+            return col
+    return None
 
+def _clean_bob_rows(df: pd.DataFrame, parse_amount=_parse_amount) -> pd.DataFrame:
     if 'CREDIT' in df.columns:
-        df['CREDIT'] = (
-            df['CREDIT']
-            .astype(str)
-            .str.replace(",", "", regex=False)
-            .str.strip()
-            .replace("", None)
-            .astype(float)
-        )
+        df['CREDIT'] = parse_amount(df['CREDIT'])
 
     if 'NARRATION' in df.columns:
-        df['EXTRACTED_POLICY'] = df['NARRATION'].apply(extract_policy_id)
+        df['EXTRACTED_POLICY'] = extract_policy_ids(df['NARRATION'])
         df = df.dropna(subset=['EXTRACTED_POLICY'])
 
     return df
 
-def clean_ricb_data(df: pd.DataFrame) -> pd.DataFrame:
-    df = drop_useless_columns(df)
-    fuzzy_keys = ['TRANSACTION STATUS', 'DEPARTMENT', 'ERR LOG', 'JOURNAL NO']
-    normalized_cols = {col: normalize(col) for col in df.columns}
-    cols_to_drop = [col for col, norm in normalized_cols.items() if norm in fuzzy_keys]
-    df = df.drop(columns=cols_to_drop, errors='ignore')
-
-    for col in df.columns:
-        if "DATE" in normalize(col):
-            df[col] = df[col].astype(str).str.extract(r'(\d{2}/\d{2}/\d{4})')
-            break
+def _clean_ricb_rows(df: pd.DataFrame, parse_amount=_parse_amount) -> pd.DataFrame:
+    date_col = _ricb_date_column(df.columns)
+    if date_col is not None:
+        df[date_col] = df[date_col].astype(str).str.extract(r'(\d{2}/\d{2}/\d{4})')
 
     if 'AMOUNT' in df.columns:
-        df['AMOUNT'] = (
-            df['AMOUNT']
-            .astype(str)
-            .str.replace(",", "", regex=False)
-            .str.strip()
-            .replace("", None)
-            .astype(float)
-        )
+        df['AMOUNT'] = parse_amount(df['AMOUNT'])
 
     return df
+
+@instrumented("clean_bob")
+def clean_bob_data(df: pd.DataFrame, compact: bool = False) -> pd.DataFrame:
+    """
+    With compact=True, CREDIT comes back as exact int64 minor units, the
+    transaction date as datetime64 and text columns as categoricals or Arrow
+    strings (see app.logic.schema).
+    """
+    df = drop_useless_columns(df)
+    df = df.drop(columns=_bob_drop_columns(df.columns), errors='ignore')
+    if not compact:
+        return _clean_bob_rows(df)
+
+    return compact_bob(_clean_bob_rows(df, parse_amount=to_minor_units))
+
+@instrumented("clean_ricb")
+def clean_ricb_data(df: pd.DataFrame, compact: bool = False) -> pd.DataFrame:
+    """
+    compact=True works as in clean_bob_data, for AMOUNT and the transaction date.
+    """
+    df = drop_useless_columns(df)
+    df = df.drop(columns=_ricb_drop_columns(df.columns), errors='ignore')
+    if not compact:
+        return _clean_ricb_rows(df)
+
+    return compact_ricb(_clean_ricb_rows(df, parse_amount=to_minor_units))
+
+def compact_bob(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The compact schema of a cleaned BOB frame (see clean_bob_data).
+    """
+    date_cols = {col: '%d-%m-%Y' for col in df.columns if "DATE" in normalize(col)}
+    return compact_frame(df, amount_cols=['CREDIT'], date_cols=date_cols)
+
+def compact_ricb(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The compact schema of a cleaned RICBL frame (see clean_ricb_data).
+    """
+    date_col = _ricb_date_column(df.columns)
+    date_cols = {date_col: '%d/%m/%Y'} if date_col is not None else {}
+    return compact_frame(df, amount_cols=['AMOUNT'], date_cols=date_cols)
+
+# Streaming cleaners: the column decisions are made once from a sample of the
+# first pages, then every later table chunk is aligned to them and row-cleaned.
+
+def bob_columns(sample: pd.DataFrame) -> list:
+    df = drop_useless_columns(sample.copy())
+    drop_cols = _bob_drop_columns(df.columns)
+    return [col for col in df.columns if col not in drop_cols]
+
+def ricb_columns(sample: pd.DataFrame) -> list:
+    df = drop_useless_columns(sample.copy())
+    drop_cols = _ricb_drop_columns(df.columns)
+    return [col for col in df.columns if col not in drop_cols]
+
+def _align_chunk(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    df = df.copy(deep=False)
+    df.columns = [str(col).strip() for col in df.columns]
+    return df.reindex(columns=columns)
+
+def clean_bob_chunk(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    return _clean_bob_rows(_align_chunk(df, columns))
+
+def clean_ricb_chunk(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    return _clean_ricb_rows(_align_chunk(df, columns))
@@ -0,0 +1,167 @@
+import importlib.util
+import io
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.logic.instrumentation import instrumented
+
+# Rows converted per step: only one chunk at a time exists in the output format
+CHUNK_ROWS = 20_000
+
+# Excel's row limit per sheet, header included; longer sets continue on another sheet
+XLSX_MAX_ROWS = 1_048_576
+
+# format -> (MIME type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+def available_formats() -> list:
+    """
+    Export formats usable here; XLSX needs the optional openpyxl package.
+    """
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "xlsx" or importlib.util.find_spec("openpyxl") is not None]
+
+def iter_chunks(df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS):
+    """
+    Row slices of df (views, not copies); an empty frame still yields one empty chunk.
+    """
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+def _column_names(columns) -> list:
+    # Parquet and sheet headers want unique strings; raw tables can repeat or lack names
+    names, seen = [], {}
+    for col in columns:
+        name = "" if col is None else str(col)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+def _with_names(df: pd.DataFrame) -> pd.DataFrame:
+    names = _column_names(df.columns)
+    if names == list(df.columns):
+        return df
+    renamed = df.copy(deep=False)
+    renamed.columns = names
+    return renamed
+
+@contextmanager
+def _binary_target(target):
+    # A path is opened (and closed) here; a file object is written as it is
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, "wb") as f:
+            yield f
+    else:
+        yield target
+
+def write_csv(df: pd.DataFrame, target, chunk_rows: int = CHUNK_ROWS):
+    with _binary_target(target) as f:
+        text = io.TextIOWrapper(f, encoding="utf-8", newline="")
+        try:
+            for i, chunk in enumerate(iter_chunks(df, chunk_rows)):
+                chunk.to_csv(text, index=False, header=i == 0)
+        finally:
+            text.flush()
+            text.detach()
+
+def write_parquet(df: pd.DataFrame, target, chunk_rows: int = CHUNK_ROWS):
+    """
+    One row group per chunk. The schema is inferred once from the whole frame,
+    so a column that is empty in the first chunk keeps its real type.
+    """
+    df = _with_names(df)
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with _binary_target(target) as f, pq.ParquetWriter(f, schema) as writer:
+        for chunk in iter_chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+def _sheet_title(title: str) -> str:
+    return re.sub(r'[\[\]:*?/\\]', '_', title)[:31]
+
+def _xlsx_rows(chunk: pd.DataFrame):
+    # openpyxl wants plain Python values: missing values (NaN, NaT, pd.NA) become empty cells
+    values = chunk.astype(object).where(chunk.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+def write_xlsx(frames: dict, target, chunk_rows: int = CHUNK_ROWS):
+    """
+    One sheet per {name: DataFrame}, written through openpyxl's write-only
+    mode, which streams rows to disk instead of keeping every cell in memory.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    rows_per_sheet = XLSX_MAX_ROWS - 1
+    for name, df in frames.items():
+        header = _column_names(df.columns)
+        for part, start in enumerate(range(0, max(len(df), 1), rows_per_sheet)):
+            sheet = workbook.create_sheet(_sheet_title(name if part == 0 else f"{name} ({part + 1})"))
+            sheet.append(header)
+            for chunk in iter_chunks(df.iloc[start:start + rows_per_sheet], chunk_rows):
+                for row in _xlsx_rows(chunk):
+                    sheet.append(row)
+    with _binary_target(target) as f:
+        workbook.save(f)
+
+def export_frame(df: pd.DataFrame, target, fmt: str, chunk_rows: int = CHUNK_ROWS, sheet_name: str = "data"):
+    """
+    Writes df to target (a path or binary file object) as csv, parquet or xlsx,
+    chunk_rows rows at a time. The index is not written.
+    """
+    if fmt == "csv":
+        write_csv(df, target, chunk_rows)
+    elif fmt == "parquet":
+        write_parquet(df, target, chunk_rows)
+    elif fmt == "xlsx":
+        write_xlsx({sheet_name: df}, target, chunk_rows)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+def export_bytes(data, fmt: str, chunk_rows: int = CHUNK_ROWS) -> bytes:
+    """
+    The export of a DataFrame (or, for xlsx, a {sheet: DataFrame} dict) as
+    bytes, e.g. the data of a Streamlit download button. The file is built
+    chunk by chunk in an anonymous temporary file and read back once, so only
+    the finished export is ever held in memory.
+    """
+    with tempfile.TemporaryFile() as f:
+        if isinstance(data, dict):
+            if fmt != "xlsx":
+                raise ValueError("Only xlsx exports hold several sets")
+            write_xlsx(data, f, chunk_rows)
+        else:
+            export_frame(data, f, fmt, chunk_rows)
+        f.seek(0)
+        return f.read()
+
+@instrumented("export")
+def export_results(frames: dict, output_dir: str, fmt: str, chunk_rows: int = CHUNK_ROWS,
+                   workbook_name: str = "reconciliation") -> list:
+    """
+    Writes each {name: DataFrame} result set into output_dir: name.csv or
+    name.parquet per set, or one workbook_name.xlsx with a sheet per set.
+    Returns the paths written.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if fmt == "xlsx":
+        path = os.path.join(output_dir, f"{workbook_name}.xlsx")
+        write_xlsx(frames, path, chunk_rows)
+        return [path]
+    paths = []
+    for name, df in frames.items():
+        path = os.path.join(output_dir, f"{name}.{EXPORT_FORMATS[fmt][1]}")
+        export_frame(df, path, fmt, chunk_rows)
+        paths.append(path)
+    return paths
@@ -1,22 +1,200 @@
-import pdfplumber
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 
-def extract_tables_from_pdf(uploaded_file) -> pd.DataFrame:
+from app.logic.instrumentation import instrumented
+from app.logic.layouts import PROFILES, detect_profile, open_document, read_page
+
+# Bump whenever a change alters the extracted tables, so cached results are not reused
+EXTRACTOR_VERSION = 2
+
+# Below this many pages the process pool start-up costs more than it saves: spawning a
+# worker and importing pdfplumber takes seconds, generic detection about 0.3s a page
+PARALLEL_MIN_PAGES = 32
+
+# The PDF handed to each pool worker once, when it starts
+_worker_source = None
+
+def _pdf_source(uploaded_file):
     """
-    Extracts all tables from a PDF and combines them into one single DataFrame.
+    Returns something a worker process can reopen: a path or the raw PDF bytes.
+    """
+    if isinstance(uploaded_file, (str, os.PathLike)):
+        return os.fspath(uploaded_file)
+    if isinstance(uploaded_file, bytes):
+        return uploaded_file
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    position = uploaded_file.tell()
+    uploaded_file.seek(0)
+    data = uploaded_file.read()
+    uploaded_file.seek(position)
+    return data
+
+def _open_pdf(source):
+    # Imported here so loading the app doesn't pay for pdfplumber/pdfminer before a file arrives
+    import pdfplumber
+    if isinstance(source, bytes):
+        return pdfplumber.open(io.BytesIO(source))
+    return pdfplumber.open(source)
+
+class _FallbackPages:
+    """
+    pdfplumber pages of one document, built one at a time in page order.
+
+    pdf.pages builds and keeps a Page for every page, and pdfminer caches
+    each parsed object (decoded content streams included) for the life of
+    the document, so a document held open for the odd page a layout profile
+    doesn't fit would grow with the file. Here neither is kept.
+    """
+
+    def __init__(self, source):
+        from pdfminer.pdfpage import PDFPage
+
+        self.pdf = _open_pdf(source)
+        self.pdf.doc.caching = False
+        self._page_objs = enumerate(PDFPage.create_pages(self.pdf.doc))
+
+    def tables(self, index: int) -> list:
+        from pdfplumber.page import Page
+
+        for number, page_obj in self._page_objs:
+            if number == index:
+                page = Page(self.pdf, page_obj, page_number=index + 1)
+                try:
+                    return _page_tables(page)
+                finally:
+                    page.close()
+        raise IndexError(index)
+
+    def close(self):
+        self.pdf.close()
+
+def _page_tables(page) -> list:
+    return [table for table in page.extract_tables() if table]
+
+def _resolve_profile(source, profile):
+    # "auto" detects the layout from the first page; None forces generic table detection
+    if profile == "auto":
+        return detect_profile(source)
+    if profile is None:
+        return None
+    return PROFILES[profile]
+
+def _page_count(source) -> int:
+    document = open_document(source)
+    try:
+        return len(document)
+    finally:
+        document.close()
+
+def _iter_page_tables(source, layout, start: int = 0, stop: int | None = None):
+    """
+    Yields the tables of each page from start to stop. With a layout profile
+    pages are read straight from pdfium's character boxes and table rules;
+    pages the profile doesn't fit go through pdfplumber's generic detection,
+    which is only opened once such a page turns up.
     """
-    all_dataframes = []
-    with pdfplumber.open(uploaded_file) as pdf:
-        for page in pdf.pages:
-            tables = page.extract_tables()
-            for table in tables:
-                if table:
-                    df = pd.DataFrame(table[1:], columns=table[0])
-                    all_dataframes.append(df)
+    if layout is None:
+        with _open_pdf(source) as pdf:
+            for page in pdf.pages[start:stop]:
+                tables = _page_tables(page)
+                page.close()
+                yield tables
+        return
+
+    document = open_document(source)
+    fallback = None
+    try:
+        for index in range(start, len(document) if stop is None else stop):
+            page = document[index]
+            try:
+                table = layout.page_table(*read_page(page))
+            finally:
+                page.close()
+            if table is not None:
+                yield [table]
+                continue
+            if fallback is None:
+                fallback = _FallbackPages(source)
+            yield fallback.tables(index)
+    finally:
+        document.close()
+        if fallback is not None:
+            fallback.close()
+
+def _extract_page_range(source, start: int, stop: int, profile: str | None = None) -> list:
+    # Runs in a worker process: reopen the PDF and only touch our slice of pages
+    layout = PROFILES[profile] if profile else None
+    return [table for tables in _iter_page_tables(source, layout, start, stop) for table in tables]
+
+def _init_worker(source):
+    global _worker_source
+    _worker_source = source
+
+def _extract_worker_range(start: int, stop: int) -> list:
+    # Generic detection only: profiled layouts are fast enough that the pool isn't used for them
+    return _extract_page_range(_worker_source, start, stop)
+
+def _page_ranges(page_count: int, workers: int) -> list:
+    # A few chunks per worker so one slow page range doesn't hold up the pool
+    chunk_count = min(page_count, workers * 4)
+    chunk_size = -(-page_count // chunk_count)
+    return [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+
+def _tables_to_dataframe(tables: list) -> pd.DataFrame:
+    all_dataframes = [pd.DataFrame(table[1:], columns=table[0]) for table in tables]
 
     # Combine all DataFrames into one
     if all_dataframes:
-        combined_df = pd.concat(all_dataframes, ignore_index=True)
-        return combined_df
-    else:
-        return pd.DataFrame()  # return empty DF if no tables
+        return pd.concat(all_dataframes, ignore_index=True)
+    return pd.DataFrame()  # return empty DF if no tables
+
+def iter_tables_from_pdf(uploaded_file, profile: str | None = "auto"):
+    """
+    Yields each table as a DataFrame, page by page, releasing every page once
+    its tables are extracted so memory does not grow with the page count.
+    """
+    source = _pdf_source(uploaded_file)
+    for tables in _iter_page_tables(source, _resolve_profile(source, profile)):
+        for table in tables:
+            yield pd.DataFrame(table[1:], columns=table[0])
+
+@instrumented("extract")
+def extract_tables_from_pdf(uploaded_file, workers: int | None = 1, min_parallel_pages: int = PARALLEL_MIN_PAGES,
+                            profile: str | None = "auto") -> pd.DataFrame:
+    """
+    Extracts all tables from a PDF and combines them into one single DataFrame.
+
+    profile names a known statement layout (see app.logic.layouts.PROFILES),
+    "auto" to detect one from the first page, or None for generic table
+    detection only. Pages a profile doesn't fit fall back to generic detection.
+
+    Generic detection is slow, so without a profile and with workers > 1 (or
+    None for one per CPU) the pages are split into contiguous ranges and
+    extracted in a process pool. Tables are merged back in page order, so the
+    result is the same as the serial run. Files with a profile or with fewer
+    than min_parallel_pages pages are always extracted serially. Workers are
+    spawned rather than forked (the caller may be a multi-threaded server) and
+    receive the PDF once each, not once per page range.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    source = _pdf_source(uploaded_file)
+    layout = _resolve_profile(source, profile)
+    name = layout.name if layout is not None else None
+    page_count = _page_count(source)
+    if layout is not None or workers <= 1 or page_count < min_parallel_pages:
+        return _tables_to_dataframe(_extract_page_range(source, 0, page_count, name))
+
+    ranges = _page_ranges(page_count, workers)
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(source,)) as executor:
+        chunks = executor.map(_extract_worker_range, [start for start, _ in ranges], [stop for _, stop in ranges])
+        tables = [table for chunk in chunks for table in chunk]
+
+    return _tables_to_dataframe(tables)
@@ -0,0 +1,166 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+
+logger = logging.getLogger("recon.perf")
+
+# How often the RSS sampler looks at the process while a stage runs
+SAMPLE_INTERVAL = 0.02
+
+def _current_rss() -> int | None:
+    """
+    Resident set size of this process in bytes, or None if it can't be read.
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+class _PeakSampler(threading.Thread):
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = _current_rss()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(SAMPLE_INTERVAL):
+            rss = _current_rss()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def stop(self) -> int | None:
+        self._stop_event.set()
+        self.join()
+        rss = _current_rss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+        return self.peak
+
+def _row_count(value) -> int | None:
+    if isinstance(value, pd.DataFrame):
+        return len(value)
+    if isinstance(value, tuple):
+        counts = [len(item) for item in value if isinstance(item, pd.DataFrame)]
+        return sum(counts) if counts else None
+    return None
+
+class StageRecorder:
+    """
+    Collects one record per instrumented stage: wall time, rows in and out and
+    peak RSS while it ran. Records are also logged to the "recon.perf" logger
+    as one JSON object per line.
+    """
+
+    def __init__(self, max_records: int = 500):
+        self.max_records = max_records
+        self.records = []
+        self.run_id = 0
+        self._lock = threading.Lock()
+
+    def new_run(self):
+        self.run_id += 1
+
+    def add(self, record: dict):
+        with self._lock:
+            self.records.append(record)
+            del self.records[:-self.max_records]
+        logger.info(json.dumps(record, default=str))
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame(self.records)
+
+    def to_json(self) -> str:
+        return json.dumps(self.records, indent=2, default=str)
+
+_default_recorder = StageRecorder()
+_current_recorder = contextvars.ContextVar("recon_stage_recorder", default=_default_recorder)
+
+def enable_json_log(path: str | None = None):
+    """
+    Writes stage records as JSON lines to path (or stderr), once per process.
+    """
+    if logger.handlers:
+        return
+    handler = logging.FileHandler(path) if path else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+def get_recorder() -> StageRecorder:
+    return _current_recorder.get()
+
+@contextmanager
+def use_recorder(recorder: StageRecorder):
+    """
+    Sends stage records from this thread/context to recorder, e.g. one per Streamlit session.
+    """
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
+
+@contextmanager
+def stage(name: str, rows_in: int | None = None, **details):
+    """
+    Times the enclosed block as one stage. The yielded dict is the record, so the
+    block can fill in rows_out (or anything else) before it is stored.
+    """
+    recorder = get_recorder()
+    record = {
+        "stage": name,
+        "run": recorder.run_id,
+        "started": datetime.now(timezone.utc).isoformat(),
+        "rows_in": rows_in,
+        "rows_out": None,
+        **details,
+    }
+    sampler = _PeakSampler()
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record["error"] = str(e)
+        raise
+    finally:
+        record["seconds"] = time.perf_counter() - start
+        peak = sampler.stop()
+        record["peak_rss_mb"] = peak / 2**20 if peak is not None else None
+        recorder.add(record)
+
+def instrumented(name: str):
+    """
+    Decorator form of stage(): rows_in counts the DataFrame arguments, rows_out
+    the DataFrame (or tuple of DataFrames) returned.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            frames = [value for value in (*args, *kwargs.values()) if isinstance(value, pd.DataFrame)]
+            rows_in = sum(len(df) for df in frames) if frames else None
+            with stage(name, rows_in=rows_in) as record:
+                result = fn(*args, **kwargs)
+                record["rows_out"] = _row_count(result)
+                return result
+        return wrapper
+    return decorator
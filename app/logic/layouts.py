@@ -0,0 +1,210 @@
+import bisect
+import io
+import re
+
+# Text lines (and rules) whose tops are closer than this many points are the same line
+LINE_TOLERANCE = 3.0
+# A horizontal gap wider than this between two characters is a space
+WORD_GAP = 3.0
+
+class LayoutProfile:
+    """
+    Fixed table layout of one bank's statement export.
+
+    columns are the header names exactly as generic detection reports them,
+    boundaries the len(columns) + 1 x positions of the column rules, and crop
+    the (x0, top, x1, bottom) region holding the table, leaving out the
+    browser's print header and footer. All positions are PDF points in the
+    page's displayed (rotated) orientation. Rows are the bands between the
+    table's horizontal rules: the first must carry the header signature and
+    every later one a record number matching anchor_pattern in anchor_column.
+    """
+
+    def __init__(self, name: str, columns: list, boundaries: list, crop: tuple,
+                 anchor_column: int = 0, anchor_pattern: str = r'^\d+$'):
+        if len(boundaries) != len(columns) + 1:
+            raise ValueError(f"{name}: {len(columns)} columns need {len(columns) + 1} boundaries")
+        self.name = name
+        self.columns = columns
+        self.boundaries = boundaries
+        self.crop = crop
+        self.anchor_column = anchor_column
+        self.anchor_pattern = re.compile(anchor_pattern)
+        # The header row signature: column names with all whitespace removed
+        self.signature = ["".join(col.split()) for col in columns]
+
+    def column_of(self, x: float) -> int | None:
+        if x < self.boundaries[0] or x >= self.boundaries[-1]:
+            return None
+        for i in range(len(self.columns)):
+            if x < self.boundaries[i + 1]:
+                return i
+        return None
+
+    def page_table(self, chars: list, rules: list) -> list | None:
+        """
+        [header, *rows] for one page, from its characters and the y positions
+        of its horizontal rules, or None when the page doesn't fit this layout.
+        """
+        x0, top, x1, bottom = self.crop
+        edges = []
+        for y in sorted(y for y in rules if top <= y <= bottom):
+            if not edges or y - edges[-1] > LINE_TOLERANCE:
+                edges.append(y)
+        if len(edges) < 3:
+            return None
+
+        # One band per table row; characters outside every band are page furniture
+        bands = [[] for _ in range(len(edges) - 1)]
+        for char in chars:
+            cx, cy = (char[0] + char[2]) / 2, (char[1] + char[3]) / 2
+            if not (x0 <= cx <= x1) or cy < edges[0] or cy > edges[-1]:
+                continue
+            band = bisect.bisect_right(edges, cy) - 1
+            bands[min(band, len(bands) - 1)].append(char)
+
+        table = []
+        for band_chars in bands:
+            cells = self._cells(band_chars)
+            if not any(cells):
+                continue
+            if not table:
+                # The first non-empty row must be the header, pinned by its signature
+                if ["".join(cell.split()) for cell in cells] != self.signature:
+                    return None
+                table.append(list(self.columns))
+            elif self.anchor_pattern.match(cells[self.anchor_column]):
+                table.append(cells)
+            else:
+                # A row without a record number (a totals row, another table): not ours
+                return None
+        return table if len(table) > 1 else None
+
+    def _cells(self, chars: list) -> list:
+        # Text lines inside one row band, then each line split into columns
+        lines = []
+        for char in sorted(chars, key=lambda c: (c[1], c[0])):
+            if lines and char[1] - lines[-1][0] <= LINE_TOLERANCE:
+                lines[-1][1].append(char)
+            else:
+                lines.append((char[1], [char]))
+
+        cells = [[] for _ in self.columns]
+        for _, line_chars in lines:
+            parts = {}
+            for char in sorted(line_chars, key=lambda c: c[0]):
+                col = self.column_of((char[0] + char[2]) / 2)
+                if col is not None:
+                    parts.setdefault(col, []).append(char)
+            for col, col_chars in parts.items():
+                # Words split on real spaces and on gaps, as generic detection does
+                text = col_chars[0][4]
+                for previous, char in zip(col_chars, col_chars[1:]):
+                    if char[5] or char[0] - previous[2] > WORD_GAP:
+                        text += " "
+                    text += char[4]
+                text = " ".join(text.split())
+                if text:
+                    cells[col].append(text)
+        return ["\n".join(lines) for lines in cells]
+
+# Measured from the BOB account statement report and the RICBL payment report
+# exports; both print every page of the table with the same column rules.
+PROFILES = {
+    "bob": LayoutProfile(
+        "bob",
+        columns=['SL.NO', 'TXN DATE', 'JOURNAL NO', 'TRAN DESC', 'NARRATION', 'DEBIT', 'CREDIT', 'BALANCE'],
+        boundaries=[51.0, 101.0, 169.0, 240.0, 413.0, 589.0, 703.0, 817.0, 931.0],
+        crop=(51.0, 15.0, 931.0, 660.0),
+    ),
+    "ricb": LayoutProfile(
+        "ricb",
+        columns=['ID#', 'POLICY/ ACCOUNT#', 'CUSTOMER\nCID#', 'CUSTOMER\nNAME', 'DEPARTMENT', 'AMOUNT',
+                 'REMITTER\nACC#', 'TRANSACTION\nID', 'TRANSACTION\nDATE', 'TRANSACTION\nSTATUS', 'ERR LOG', 'JOURNAL\nNO'],
+        boundaries=[28.8, 67.6, 173.5, 228.9, 299.1, 360.2, 405.1, 453.2, 517.3, 581.6, 646.0, 718.4, 764.0],
+        crop=(28.8, 26.0, 764.0, 590.0),
+    ),
+}
+
+def open_document(source):
+    """
+    pypdfium2 document for a path or raw PDF bytes.
+    """
+    import pypdfium2 as pdfium
+    return pdfium.PdfDocument(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+def _display_box(box: tuple, rotation: int, width: float, height: float) -> tuple:
+    # pdfium reports char boxes in unrotated PDF space (origin bottom left);
+    # pdfplumber and the profiles use the displayed page (origin top left)
+    left, bottom, right, top = box
+    if rotation == 90:
+        return bottom, left, top, right
+    if rotation == 180:
+        return width - right, bottom, width - left, top
+    if rotation == 270:
+        return height - top, width - right, height - bottom, width - left
+    return left, height - top, right, height - bottom
+
+def read_page(page) -> tuple:
+    """
+    A pypdfium2 page's characters as (x0, top, x1, bottom, char, space_before)
+    and the tops of its horizontal rules, all in display coordinates.
+    """
+    import pypdfium2.raw as pdfium_c
+
+    rotation = page.get_rotation()
+    left, bottom, right, top = page.get_mediabox()
+    width, height = right - left, top - bottom
+
+    textpage = page.get_textpage()
+    try:
+        text = textpage.get_text_range()
+        chars = []
+        pending_space = False
+        # get_text_range is one character per index, with \r\n between pdfium's text lines
+        for i in range(textpage.count_chars()):
+            char = text[i] if i < len(text) else textpage.get_text_range(i, 1)
+            if char in "\r\n":
+                pending_space = False
+                continue
+            if char == "\ufffe":
+                # pdfium's marker for a hyphen that ends a line
+                char = "-"
+            elif char == " " and pdfium_c.FPDFText_IsGenerated(textpage.raw, i):
+                # A space pdfium inferred has no real box; it only marks a word break before the next char
+                pending_space = True
+                continue
+            # Tight box for the horizontal extent, loose (font-height) box so a line shares one top
+            x0, _, x1, _ = _display_box(textpage.get_charbox(i), rotation, width, height)
+            _, y0, _, y1 = _display_box(textpage.get_charbox(i, loose=True), rotation, width, height)
+            space_before = pending_space and bool(chars) and abs(chars[-1][1] - y0) <= LINE_TOLERANCE and chars[-1][0] < x0
+            chars.append((x0, y0, x1, y1, char, space_before))
+            pending_space = False
+    finally:
+        textpage.close()
+
+    rules = []
+    for obj in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_PATH], max_depth=5):
+        x0, y0, x1, y1 = _display_box(obj.get_bounds(), rotation, width, height)
+        if y1 - y0 <= 2.0 and x1 - x0 >= 10.0:
+            rules.append((y0 + y1) / 2)
+    return chars, rules
+
+def detect_profile(source) -> LayoutProfile | None:
+    """
+    The profile whose header fits the first page, or None for an unknown layout.
+    """
+    try:
+        document = open_document(source)
+    except Exception:
+        return None
+    try:
+        if len(document) == 0:
+            return None
+        chars, rules = read_page(document[0])
+    finally:
+        document.close()
+    for profile in PROFILES.values():
+        if profile.page_table(chars, rules) is not None:
+            return profile
+    return None
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+from sqlalchemy import (
+    Column, Date, DateTime, ForeignKey, Index, Integer, MetaData, String, Table, Text, UniqueConstraint,
+    create_engine, select, update,
+)
+
+from app.logic.cleaner import _ricb_date_column
+from app.logic.matcher import match_records, parse_dates, policy_key
+from app.logic.schema import as_minor_units
+
+DEFAULT_LEDGER_URL = os.getenv("RECON_LEDGER_URL", "sqlite:///reconciliation_ledger.db")
+
+# Which cleaned columns hold the amount, date, policy and a row reference on each
+# side; a date of None means the RICBL date column is detected by name
+SIDE_COLUMNS = {
+    "bob": {"amount": "CREDIT", "date": "TXN DATE", "policy": "EXTRACTED_POLICY", "reference": ["JOURNAL NO"]},
+    "ricb": {"amount": "AMOUNT", "date": None, "policy": "POLICY/ ACCOUNT#", "reference": ["ID#"]},
+}
+
+# Stay well under SQLite's bound-parameter limit for IN (...) lookups
+_IN_CHUNK = 500
+
+metadata = MetaData()
+
+ledger_rows = Table(
+    "ledger_rows", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("side", String(4), nullable=False),
+    Column("fingerprint", String(64), nullable=False),
+    Column("amount_minor", Integer),
+    Column("txn_date", Date),
+    Column("policy", String(64)),
+    Column("state", String(10), nullable=False, default="unmatched"),
+    Column("match_id", Integer),
+    Column("source", String(64)),
+    Column("ingested_at", DateTime, nullable=False),
+    Column("payload", Text, nullable=False),
+    UniqueConstraint("side", "fingerprint", name="uq_ledger_rows_fingerprint"),
+    Index("ix_ledger_rows_amount", "side", "state", "amount_minor"),
+    Index("ix_ledger_rows_date", "side", "state", "txn_date"),
+    Index("ix_ledger_rows_policy", "side", "state", "policy"),
+)
+
+ledger_matches = Table(
+    "ledger_matches", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("bob_row_id", Integer, ForeignKey("ledger_rows.id"), nullable=False),
+    Column("ricb_row_id", Integer, ForeignKey("ledger_rows.id"), nullable=False),
+    Column("matched_at", DateTime, nullable=False),
+)
+
+def _ledger_frame(df: pd.DataFrame, side: str, columns: dict) -> pd.DataFrame:
+    """
+    The indexed fields of each row plus a stable fingerprint and the row as JSON.
+    """
+    amount = columns["amount"]
+    frame = pd.DataFrame(index=df.index)
+    frame["amount_minor"] = as_minor_units(df[amount]) if amount in df.columns else pd.NA
+    date_col = columns["date"] or _ricb_date_column(df.columns)
+    frame["txn_date"] = parse_dates(df[date_col]).dt.date if date_col is not None and date_col in df.columns else None
+    policy_col = columns["policy"]
+    frame["policy"] = policy_key(df[policy_col].astype("string")) if policy_col in df.columns else None
+
+    references = [col for col in columns["reference"] if col in df.columns]
+    identity = pd.concat([frame[["amount_minor", "txn_date", "policy"]], df[references]], axis=1).astype(str)
+    content = pd.Series(["|".join(row) for row in identity.itertuples(index=False)], index=df.index, dtype=object)
+    # Identical rows in one upload are distinct transactions: number them
+    occurrence = content.groupby(content, sort=False).cumcount().astype(str)
+    frame["fingerprint"] = [
+        hashlib.sha256(f"{side}|{text}#{n}".encode()).hexdigest()
+        for text, n in zip(content.tolist(), occurrence.tolist())
+    ]
+    frame["payload"] = [json.dumps(record, default=str) for record in df.to_dict("records")]
+    return frame
+
+def _chunks(values: list):
+    for start in range(0, len(values), _IN_CHUNK):
+        yield values[start:start + _IN_CHUNK]
+
+class ReconciliationLedger:
+    """
+    Persistent record of every ingested statement row and its match state.
+
+    ingest() only stores rows whose fingerprint hasn't been seen, and
+    reconcile() only matches those new rows against the outstanding unmatched
+    pool, looked up through the amount index, so a daily run costs time in
+    proportion to the new rows rather than the whole history.
+    """
+
+    def __init__(self, url: str = DEFAULT_LEDGER_URL):
+        self.engine = create_engine(url)
+        metadata.create_all(self.engine)
+
+    def ingest(self, bob_df: pd.DataFrame, ricb_df: pd.DataFrame, source: str | None = None,
+               side_columns: dict | None = None) -> dict:
+        """
+        Stores the rows not seen before; returns the new row ids per side.
+        """
+        side_columns = side_columns or SIDE_COLUMNS
+        new_ids = {}
+        now = datetime.now(timezone.utc)
+        with self.engine.begin() as conn:
+            for side, df in (("bob", bob_df), ("ricb", ricb_df)):
+                frame = _ledger_frame(df, side, side_columns[side])
+                fingerprints = frame["fingerprint"].tolist()
+                known = set()
+                for chunk in _chunks(fingerprints):
+                    known.update(conn.execute(
+                        select(ledger_rows.c.fingerprint)
+                        .where(ledger_rows.c.side == side, ledger_rows.c.fingerprint.in_(chunk))
+                    ).scalars())
+                fresh = frame[~frame["fingerprint"].isin(known)]
+                if fresh.empty:
+                    new_ids[side] = []
+                    continue
+
+                rows = [
+                    {
+                        "side": side,
+                        "fingerprint": record["fingerprint"],
+                        "amount_minor": None if pd.isna(record["amount_minor"]) else int(record["amount_minor"]),
+                        "txn_date": None if pd.isna(record["txn_date"]) else record["txn_date"],
+                        "policy": None if pd.isna(record["policy"]) else record["policy"],
+                        "state": "unmatched",
+                        "source": source,
+                        "ingested_at": now,
+                        "payload": record["payload"],
+                    }
+                    for record in fresh.to_dict("records")
+                ]
+                conn.execute(ledger_rows.insert(), rows)
+                ids = []
+                for chunk in _chunks(fresh["fingerprint"].tolist()):
+                    ids.extend(conn.execute(
+                        select(ledger_rows.c.id)
+                        .where(ledger_rows.c.side == side, ledger_rows.c.fingerprint.in_(chunk))
+                    ).scalars())
+                new_ids[side] = sorted(ids)
+        return new_ids
+
+    def _rows(self, conn, where) -> pd.DataFrame:
+        query = select(
+            ledger_rows.c.id, ledger_rows.c.side, ledger_rows.c.amount_minor,
+            ledger_rows.c.txn_date, ledger_rows.c.policy,
+        ).where(*where)
+        rows = pd.DataFrame(conn.execute(query).all(), columns=["id", "side", "amount_minor", "txn_date", "policy"])
+        rows["txn_date"] = pd.to_datetime(rows["txn_date"])
+        return rows
+
+    def reconcile(self, new_ids: dict, date_window_days: int | None = None, match_policy: bool = False) -> dict:
+        """
+        Matches the new rows one-to-one against the unmatched rows of the other
+        side with the same amount (and policy / date window if asked for).
+        """
+        with self.engine.begin() as conn:
+            new_rows = []
+            for side in ("bob", "ricb"):
+                for chunk in _chunks(list(new_ids.get(side, []))):
+                    new_rows.append(self._rows(conn, [ledger_rows.c.id.in_(chunk)]))
+            new_rows = pd.concat(new_rows, ignore_index=True) if new_rows else pd.DataFrame()
+            if new_rows.empty:
+                return {"matched": 0}
+
+            # Outstanding pool per side: the side's new rows plus its unmatched rows sharing an
+            # amount with a new row of the other side, so each lookup seeks (side, state, amount)
+            pools = {}
+            for side, other in (("bob", "ricb"), ("ricb", "bob")):
+                amounts = sorted({int(a) for a in new_rows.loc[new_rows["side"] == other, "amount_minor"].dropna()})
+                pool = [new_rows[new_rows["side"] == side]] + [
+                    self._rows(conn, [
+                        ledger_rows.c.side == side,
+                        ledger_rows.c.state == "unmatched",
+                        ledger_rows.c.amount_minor.in_(chunk),
+                    ])
+                    for chunk in _chunks(amounts)
+                ]
+                pool = pd.concat(pool, ignore_index=True).drop_duplicates("id")
+                pools[side] = pool.sort_values("id").set_index("id", drop=False)
+            bob, ricb = pools["bob"], pools["ricb"]
+            if bob.empty or ricb.empty:
+                return {"matched": 0}
+
+            keys = ["amount_minor", "policy"] if match_policy else ["amount_minor"]
+            date_args = {}
+            if date_window_days is not None:
+                date_args = {"bob_date_col": "txn_date", "ricb_date_col": "txn_date", "date_window_days": date_window_days}
+            matched, _, _ = match_records(bob, ricb, keys, keys, **date_args)
+
+            # A pair of two old rows was already checked on an earlier run; keep only pairs touching a new row
+            fresh = set(new_ids.get("bob", [])) | set(new_ids.get("ricb", []))
+            pairs = [
+                (int(b), int(r)) for b, r in zip(matched["bob_index"], matched["ricb_index"])
+                if b in fresh or r in fresh
+            ]
+            now = datetime.now(timezone.utc)
+            for bob_id, ricb_id in pairs:
+                match_id = conn.execute(
+                    ledger_matches.insert().values(bob_row_id=bob_id, ricb_row_id=ricb_id, matched_at=now)
+                ).inserted_primary_key[0]
+                conn.execute(
+                    update(ledger_rows)
+                    .where(ledger_rows.c.id.in_([bob_id, ricb_id]))
+                    .values(state="matched", match_id=match_id)
+                )
+        return {"matched": len(pairs)}
+
+    def ingest_and_reconcile(self, bob_df: pd.DataFrame, ricb_df: pd.DataFrame, source: str | None = None,
+                             **reconcile_options) -> dict:
+        new_ids = self.ingest(bob_df, ricb_df, source=source)
+        result = self.reconcile(new_ids, **reconcile_options)
+        return {"new_bob": len(new_ids["bob"]), "new_ricb": len(new_ids["ricb"]), **result}
+
+    def outstanding(self, side: str) -> pd.DataFrame:
+        """
+        Unmatched rows of one side, rebuilt from their stored payloads.
+        """
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(ledger_rows.c.id, ledger_rows.c.payload)
+                .where(ledger_rows.c.side == side, ledger_rows.c.state == "unmatched")
+                .order_by(ledger_rows.c.id)
+            ).all()
+        return pd.DataFrame(
+            [json.loads(payload) for _, payload in rows],
+            index=pd.Index([row_id for row_id, _ in rows], name="ledger_id"),
+        )
+
+    def counts(self) -> dict:
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(ledger_rows.c.side, ledger_rows.c.state, ledger_rows.c.id)
+            ).all()
+        counts = pd.DataFrame(rows, columns=["side", "state", "id"]).groupby(["side", "state"]).size()
+        return {f"{side}_{state}": int(n) for (side, state), n in counts.items()}
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+DEFAULT_API_URL = os.getenv("OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
+DEFAULT_MODEL = os.getenv("OPENROUTER_MODEL", "deepseek/deepseek-r1-zero:free")
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (5.0, float(os.getenv("RECON_LLM_TIMEOUT", "60")))
+DEFAULT_CACHE_TTL = float(os.getenv("RECON_LLM_CACHE_TTL", "3600"))
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Cache form of a user's free-text question: case, spacing and trailing
+    punctuation don't change the answer. Not for whole LLM prompts, whose
+    column names and code are case-sensitive; see prompt_key.
+    """
+    return re.sub(r'\s+', ' ', prompt).strip().lower().rstrip("?!. ")
+
+def prompt_key(prompt: str) -> str:
+    """
+    Cache key of an exact LLM prompt.
+    """
+    return hashlib.sha256(prompt.encode()).hexdigest()
+
+def frame_fingerprint(df: pd.DataFrame | None) -> str | None:
+    """
+    Content hash of a DataFrame (values, index and column names).
+    """
+    if df is None:
+        return None
+    digest = hashlib.sha256(json.dumps([str(col) for col in df.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache whose entries also expire ttl seconds after being stored.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = DEFAULT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class LLMClient:
+    """
+    OpenAI-compatible chat completions client over one pooled keep-alive
+    session, with connect/read timeouts and retries on connection errors,
+    429 and 5xx. stream() yields the content deltas as they arrive.
+    """
+
+    def __init__(self, api_key: str, api_url: str = DEFAULT_API_URL, model: str = DEFAULT_MODEL,
+                 timeout=DEFAULT_TIMEOUT, max_retries: int = 2, pool_size: int = 4, headers: dict | None = None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.api_url = api_url
+        self.model = model
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(
+            total=max_retries, backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset({"POST"}),
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            **(headers or {}),
+        })
+
+    def _payload(self, prompt: str, stream: bool) -> dict:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": stream,
+        }
+
+    def complete(self, prompt: str) -> str:
+        response = self.session.post(self.api_url, json=self._payload(prompt, False), timeout=self.timeout)
+        response.raise_for_status()
+        return response.json().get("choices", [{}])[0].get("message", {}).get("content", "")
+
+    def stream(self, prompt: str):
+        """
+        Yields content chunks from a server-sent-events completion.
+        """
+        with self.session.post(self.api_url, json=self._payload(prompt, True), timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                # SSE: "data: {...}" lines, ": keep-alive" comments, "data: [DONE]" at the end
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                # Read on to the end of the body after [DONE] so the connection goes back to the pool
+                if data == "[DONE]":
+                    continue
+                choice = json.loads(data).get("choices", [{}])[0]
+                content = choice.get("delta", {}).get("content") or choice.get("message", {}).get("content")
+                if content:
+                    yield content
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+from app.logic.instrumentation import instrumented
+
+def policy_key(policies: pd.Series, segments: int = 3) -> pd.Series:
+    """
+    Reduces policy IDs to their first segments, e.g. 'BLTERM1/2019/919/F' and
+    'BLTERM1/2019/919/10709003946' both become 'BLTERM1/2019/919', so RICBL
+    policies and BOB extracted policies can be joined exactly.
+    """
+    parts = policies.str.upper().str.replace(r'\s+', '', regex=True).str.split('/')
+    return parts.str[:segments].str.join('/')
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    # BOB writes 24-03-2025 and RICBL 24/03/2025
+    text = values.astype(str).str.strip().str.replace('/', '-', regex=False)
+    return pd.to_datetime(text, format='%d-%m-%Y', errors='coerce')
+
+def _as_list(columns) -> list:
+    return [columns] if isinstance(columns, str) else list(columns)
+
+def _group_codes(bob_keys: pd.DataFrame, ricb_keys: pd.DataFrame) -> tuple:
+    # One shared integer code per distinct composite key; rows with a missing key part get -1
+    keys = pd.concat([bob_keys, ricb_keys], ignore_index=True)
+    codes = keys.groupby(list(keys.columns), sort=False, dropna=True).ngroup().to_numpy()
+    codes = np.where(keys.notna().all(axis=1).to_numpy(), codes, -1).astype(np.int64)
+    return codes[:len(bob_keys)], codes[len(bob_keys):]
+
+def _pair_exact(bob_codes: np.ndarray, ricb_codes: np.ndarray) -> tuple:
+    # Number the duplicates of each key on both sides; the n-th BOB row of a key
+    # can only pair with the n-th RICBL row of that key
+    bob = pd.DataFrame({'code': bob_codes, 'pos': np.arange(len(bob_codes))})
+    ricb = pd.DataFrame({'code': ricb_codes, 'pos': np.arange(len(ricb_codes))})
+    bob = bob[bob['code'] >= 0]
+    ricb = ricb[ricb['code'] >= 0]
+    bob['occurrence'] = bob.groupby('code').cumcount()
+    ricb['occurrence'] = ricb.groupby('code').cumcount()
+    pairs = bob.merge(ricb, on=['code', 'occurrence'], suffixes=('_bob', '_ricb'))
+    return pairs['pos_bob'].to_numpy(), pairs['pos_ricb'].to_numpy()
+
+def _pair_within_window(bob_codes: np.ndarray, ricb_codes: np.ndarray, bob_dates: pd.Series,
+                        ricb_dates: pd.Series, window: pd.Timedelta) -> tuple:
+    # Sort both sides by (key, date) and walk them together: within a key, the
+    # earliest unconsumed rows pair whenever their dates are within the window
+    bob_days = bob_dates.to_numpy(dtype='datetime64[ns]')
+    ricb_days = ricb_dates.to_numpy(dtype='datetime64[ns]')
+    bob_valid = (bob_codes >= 0) & ~np.isnat(bob_days)
+    ricb_valid = (ricb_codes >= 0) & ~np.isnat(ricb_days)
+    bob_pos = np.flatnonzero(bob_valid)
+    ricb_pos = np.flatnonzero(ricb_valid)
+    bob_pos = bob_pos[np.lexsort((bob_days[bob_pos], bob_codes[bob_pos]))]
+    ricb_pos = ricb_pos[np.lexsort((ricb_days[ricb_pos], ricb_codes[ricb_pos]))]
+
+    b_codes = bob_codes[bob_pos].tolist()
+    r_codes = ricb_codes[ricb_pos].tolist()
+    b_days = bob_days[bob_pos].astype(np.int64).tolist()
+    r_days = ricb_days[ricb_pos].astype(np.int64).tolist()
+    tolerance = int(window.value)
+
+    matched_bob, matched_ricb = [], []
+    i = j = 0
+    while i < len(b_codes) and j < len(r_codes):
+        if b_codes[i] < r_codes[j]:
+            i += 1
+        elif b_codes[i] > r_codes[j]:
+            j += 1
+        elif abs(b_days[i] - r_days[j]) <= tolerance:
+            matched_bob.append(bob_pos[i])
+            matched_ricb.append(ricb_pos[j])
+            i += 1
+            j += 1
+        elif r_days[j] < b_days[i]:
+            j += 1
+        else:
+            i += 1
+    return np.asarray(matched_bob, dtype=np.int64), np.asarray(matched_ricb, dtype=np.int64)
+
+@instrumented("match")
+def match_records(bob_df: pd.DataFrame, ricb_df: pd.DataFrame, bob_on, ricb_on, bob_date_col: str | None = None,
+                  ricb_date_col: str | None = None, date_window_days: int | None = None):
+    """
+    One-to-one exact matching of BOB and RICBL rows on one or more key columns.
+
+    Each row is used at most once: two RICBL entries of 5,000 only both match
+    if there are two BOB credits of 5,000. With date columns and
+    date_window_days, rows with equal keys also need dates no more than that
+    many days apart. Returns (matched, unmatched_bob, unmatched_ricb); matched
+    holds one row per pair with the bob_index/ricb_index labels followed by the
+    BOB and RICBL columns, suffixed '_bob'/'_ricb' where the names collide.
+    """
+    bob_on = _as_list(bob_on)
+    ricb_on = _as_list(ricb_on)
+    if len(bob_on) != len(ricb_on):
+        raise ValueError("bob_on and ricb_on must name the same number of columns")
+
+    key_names = [f'key{i}' for i in range(len(bob_on))]
+    bob_keys = bob_df[bob_on].set_axis(key_names, axis=1)
+    ricb_keys = ricb_df[ricb_on].set_axis(key_names, axis=1)
+    bob_codes, ricb_codes = _group_codes(bob_keys, ricb_keys)
+
+    if date_window_days is not None:
+        if bob_date_col is None or ricb_date_col is None:
+            raise ValueError("date_window_days needs both bob_date_col and ricb_date_col")
+        bob_pos, ricb_pos = _pair_within_window(
+            bob_codes, ricb_codes,
+            parse_dates(bob_df[bob_date_col]), parse_dates(ricb_df[ricb_date_col]),
+            pd.Timedelta(days=date_window_days),
+        )
+    else:
+        bob_pos, ricb_pos = _pair_exact(bob_codes, ricb_codes)
+
+    order = np.argsort(bob_pos, kind='stable')
+    bob_pos, ricb_pos = bob_pos[order], ricb_pos[order]
+
+    bob_part = bob_df.iloc[bob_pos]
+    ricb_part = ricb_df.iloc[ricb_pos]
+    matched = pd.concat(
+        [
+            pd.DataFrame({'bob_index': bob_part.index, 'ricb_index': ricb_part.index}),
+            bob_part.reset_index(drop=True).join(ricb_part.reset_index(drop=True), lsuffix='_bob', rsuffix='_ricb'),
+        ],
+        axis=1,
+    )
+
+    bob_matched = np.zeros(len(bob_df), dtype=bool)
+    bob_matched[bob_pos] = True
+    ricb_matched = np.zeros(len(ricb_df), dtype=bool)
+    ricb_matched[ricb_pos] = True
+
+    return matched, bob_df[~bob_matched], ricb_df[~ricb_matched]
@@ -0,0 +1,124 @@
+import os
+from itertools import chain
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.logic.extractor import iter_tables_from_pdf
+from app.logic.cleaner import bob_columns, clean_bob_chunk, compact_bob, compact_ricb, ricb_columns, clean_ricb_chunk
+from app.logic.instrumentation import stage
+
+# Statement kind -> (column planner, chunk cleaner)
+STREAM_CLEANERS = {
+    "bob": (bob_columns, clean_bob_chunk),
+    "ricb": (ricb_columns, clean_ricb_chunk),
+}
+
+# Statement kind -> compact schema conversion of a cleaned frame
+COMPACTORS = {"bob": compact_bob, "ricb": compact_ricb}
+
+# Parquet types fixed up front for the cleaned amount columns, whatever the first chunk holds
+AMOUNT_TYPES = {"CREDIT": pa.float64(), "AMOUNT": pa.float64()}
+
+class ParquetSink:
+    """
+    Appends cleaned chunks to a single Parquet file as row groups.
+
+    The schema is fixed by the first chunk; later chunks are cast to it. A
+    column can be entirely empty in the first chunk (all None, or NaN where
+    the chunk lacked a planned column), so such columns are stored as text,
+    except those named in types (the amount columns by default), which always
+    get the type given there.
+    """
+
+    def __init__(self, path: str, types: dict | None = None):
+        self.path = path
+        self.types = AMOUNT_TYPES if types is None else types
+        self.schema = None
+        self._writer = None
+
+    def _first_schema(self, df: pd.DataFrame) -> pa.Schema:
+        inferred = pa.Schema.from_pandas(df, preserve_index=True)
+        fields = []
+        for field in inferred:
+            if field.name in self.types:
+                field = field.with_type(self.types[field.name])
+            elif field.name in df.columns and df[field.name].isna().all():
+                field = field.with_type(pa.large_string())
+            fields.append(field)
+        return pa.schema(fields, metadata=inferred.metadata)
+
+    def __call__(self, df: pd.DataFrame):
+        if self._writer is None:
+            self.schema = self._first_schema(df)
+            self._writer = pq.ParquetWriter(self.path, self.schema)
+        self._writer.write_table(pa.Table.from_pandas(df, schema=self.schema, preserve_index=True))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def stream_clean_statement(uploaded_file, kind: str, sink, sample_tables: int = 2) -> int:
+    """
+    Extracts and cleans a statement one table chunk at a time, handing each
+    cleaned chunk to sink (any callable taking a DataFrame, e.g. ParquetSink).
+
+    Columns to keep are decided once from the first sample_tables tables and
+    reused for every later chunk. Row labels continue across chunks, so the
+    chunks concatenate to the same frame clean_bob_data/clean_ricb_data give
+    on the full table. Returns the number of cleaned rows written.
+    """
+    plan_columns, clean_chunk = STREAM_CLEANERS[kind]
+    tables = iter_tables_from_pdf(uploaded_file)
+
+    sample = []
+    for table in tables:
+        sample.append(table)
+        if len(sample) >= sample_tables:
+            break
+    if not sample:
+        return 0
+    columns = plan_columns(pd.concat(sample, ignore_index=True))
+
+    offset = 0
+    rows_written = 0
+    for table in chain(sample, tables):
+        table.index = pd.RangeIndex(offset, offset + len(table))
+        offset += len(table)
+        cleaned = clean_chunk(table, columns)
+        if len(cleaned):
+            sink(cleaned)
+            rows_written += len(cleaned)
+    return rows_written
+
+def stream_to_parquet(uploaded_file, kind: str, path: str) -> int:
+    """
+    stream_clean_statement into a Parquet file at path, recorded as a
+    "stream_clean" stage. Only one table chunk and its cleaned rows are in
+    memory at a time. Returns the number of rows written; with none, no file
+    is left at path.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    with stage("stream_clean", kind=kind) as record:
+        with ParquetSink(path) as sink:
+            record["rows_out"] = stream_clean_statement(uploaded_file, kind, sink)
+    return record["rows_out"]
+
+def read_cleaned(path: str, kind: str, compact: bool = False) -> pd.DataFrame:
+    """
+    A statement written by stream_to_parquet, as clean_bob_data/clean_ricb_data
+    would have returned it (compact=True as with their compact option).
+    """
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    df = pd.read_parquet(path)
+    return COMPACTORS[kind](df) if compact else df
@@ -0,0 +1,306 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from app.logic.instrumentation import instrumented
+from app.logic.schema import as_minor_units, from_minor_units
+
+# Session-state frames the chatbot can answer about, with the wording used in answers
+FRAME_LABELS = {
+    "matched_df": "matched",
+    "unmatched_bob_df": "unmatched BOB",
+    "unmatched_ricb_df": "unmatched RICBL",
+}
+
+# First column present is the frame's amount; matched frames carry both sides' columns
+AMOUNT_COLUMNS = {
+    "matched_df": ["AMOUNT", "CREDIT", "AMOUNT_ricb", "CREDIT_bob"],
+    "unmatched_bob_df": ["CREDIT"],
+    "unmatched_ricb_df": ["AMOUNT"],
+}
+
+POLICY_COLUMNS = ["EXTRACTED_POLICY", "POLICY/ ACCOUNT#", "EXTRACTED_POLICY_bob", "POLICY/ ACCOUNT#_ricb"]
+
+PREVIEW_ROWS = 20
+
+_NUMBER = r'(?:nu\.?|btn\.?)?\s*(\d[\d,]*(?:\.\d+)?)'
+_BETWEEN = re.compile(rf'between\s+{_NUMBER}\s+and\s+{_NUMBER}')
+# (pattern, bound, inclusive)
+_BOUNDS = [
+    (re.compile(rf'(?:at least|no less than|>=)\s*{_NUMBER}'), "low", True),
+    (re.compile(rf'(?:over|above|more than|greater than|exceeding|>)\s*{_NUMBER}'), "low", False),
+    (re.compile(rf'(?:at most|no more than|up to|<=)\s*{_NUMBER}'), "high", True),
+    (re.compile(rf'(?:under|below|less than|<)\s*{_NUMBER}'), "high", False),
+]
+_EQUALS = re.compile(rf'(?:equal to|equals|exactly|amount of|amount is|=)\s*{_NUMBER}')
+_TOP = re.compile(r'\b(?:top|largest|highest|biggest)\s+(\d+)\b|\b(\d+)\s+(?:largest|highest|biggest)\b')
+_BOTTOM = re.compile(r'\b(?:bottom|smallest|lowest)\s+(\d+)\b|\b(\d+)\s+(?:smallest|lowest)\b')
+_POLICY = re.compile(r'policy(?:\s*(?:no\.?|number|id|#))?\s*[:=]?\s*([A-Za-z0-9]+(?:/[A-Za-z0-9]+)+)', re.IGNORECASE)
+# (intent, pattern) in priority order, after top-N / bottom-N
+_INTENTS = [
+    ("count", re.compile(r'how many|\bcount\b|number of')),
+    ("sum", re.compile(r'\b(?:sum|total)\b')),
+    ("average", re.compile(r'\b(?:average|mean|avg)\b')),
+    ("max", re.compile(r'\b(?:largest|highest|biggest|maximum|max)\b')),
+    ("min", re.compile(r'\b(?:smallest|lowest|minimum|min)\b')),
+    ("list", re.compile(r'\b(?:show|list|display|give me|which)\b')),
+]
+# Words that may be left once intent, frame, amount bounds and policy are taken out.
+# Anything else (not, except, dates, names, other columns...) is a filter the
+# engine doesn't understand, so the question goes to the agent instead.
+_FILLER = frozenset("""
+    a all amount amounts and are bob both by can credit credits display do does entries entry for from give has
+    have how i in is list many matched me number of on overall payment payments please record records ricb ricbl
+    row rows s show tell than that the there to total transaction transactions unmatched value values was we
+    were what whats with you
+""".split())
+
+def _take(pattern: re.Pattern, text: str) -> tuple:
+    """
+    (match, text with the match blanked out); (None, text) when it doesn't match.
+    """
+    match = pattern.search(text)
+    if match is None:
+        return None, text
+    return match, f"{text[:match.start()]} {text[match.end():]}"
+
+def _number(text: str) -> float:
+    return float(text.replace(",", ""))
+
+def _amounts(df: pd.DataFrame, col: str | None) -> np.ndarray:
+    if col is None:
+        return np.full(len(df), np.nan)
+    values = df[col]
+    if pd.api.types.is_integer_dtype(values):
+        # Compact frames keep amounts as integer minor units, and the matched
+        # frames built from them don't carry df.attrs along
+        return from_minor_units(as_minor_units(values)).to_numpy(dtype=float, na_value=np.nan)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float, na_value=np.nan)
+    text = values.astype(str).str.replace(",", "", regex=False).str.strip()
+    return pd.to_numeric(text, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+def _money(value: float) -> str:
+    return f"{value:,.2f}"
+
+class FrameSummary:
+    """
+    Amounts of one result frame sorted once, with running totals, so any
+    count / sum / average over an amount range is two binary searches.
+    """
+
+    def __init__(self, df: pd.DataFrame, amount_col: str | None):
+        self.df = df
+        self.amount_col = amount_col
+        self.amounts = _amounts(df, amount_col)
+        valid = np.flatnonzero(~np.isnan(self.amounts))
+        self.order = valid[np.argsort(self.amounts[valid], kind="stable")]
+        self.sorted = self.amounts[self.order]
+        self.prefix = np.concatenate([[0.0], np.cumsum(self.sorted)])
+        self._policies = None
+
+    def span(self, low=None, low_inclusive=True, high=None, high_inclusive=True) -> tuple:
+        """
+        Start/stop into the sorted amounts for the given bounds.
+        """
+        start = 0 if low is None else int(np.searchsorted(self.sorted, low, "left" if low_inclusive else "right"))
+        stop = len(self.sorted) if high is None else int(np.searchsorted(self.sorted, high, "right" if high_inclusive else "left"))
+        return start, max(start, stop)
+
+    def policies(self) -> pd.Series | None:
+        if self._policies is None:
+            cols = [col for col in POLICY_COLUMNS if col in self.df.columns]
+            if not cols:
+                return None
+            text = self.df[cols].astype(str).agg(" ".join, axis=1)
+            self._policies = text.str.upper().str.replace(r'\s+', ' ', regex=True)
+        return self._policies
+
+class QueryEngine:
+    """
+    Answers the common count / sum / average / min / max / top-N / list
+    questions about the reconciliation results straight from FrameSummary,
+    without the LLM. answer() returns None for anything it can't parse
+    confidently, so the caller can fall through to the pandas agent.
+    """
+
+    def __init__(self, frames: dict):
+        self.frames = frames
+        self._summaries = {}
+
+    def summary(self, name: str) -> FrameSummary:
+        if name not in self._summaries:
+            df = self.frames[name]
+            amount_col = next((col for col in AMOUNT_COLUMNS[name] if col in df.columns), None)
+            self._summaries[name] = FrameSummary(df, amount_col)
+        return self._summaries[name]
+
+    @staticmethod
+    def _frame_names(query: str) -> list | None:
+        bob = "bob" in query
+        ricb = "ricb" in query
+        if re.search(r'\bunmatched\b', query):
+            if bob and not ricb:
+                return ["unmatched_bob_df"]
+            if ricb and not bob:
+                return ["unmatched_ricb_df"]
+            return ["unmatched_bob_df", "unmatched_ricb_df"]
+        if re.search(r'\bmatched\b', query):
+            return ["matched_df"]
+        return None
+
+    @staticmethod
+    def _bounds(text: str) -> tuple:
+        """
+        (amount bounds or None, text with the parsed bounds taken out).
+        """
+        between, text = _take(_BETWEEN, text)
+        if between:
+            low, high = sorted((_number(between.group(1)), _number(between.group(2))))
+            return {"low": low, "low_inclusive": True, "high": high, "high_inclusive": True}, text
+        equals, text = _take(_EQUALS, text)
+        if equals:
+            value = _number(equals.group(1))
+            return {"low": value, "low_inclusive": True, "high": value, "high_inclusive": True}, text
+        bounds = {}
+        for pattern, bound, inclusive in _BOUNDS:
+            if bound in bounds:
+                continue
+            match, text = _take(pattern, text)
+            if match:
+                bounds[bound] = _number(match.group(1))
+                bounds[f"{bound}_inclusive"] = inclusive
+        return bounds or None, text
+
+    @staticmethod
+    def _describe(bounds: dict | None, policy: str | None) -> str:
+        parts = []
+        if bounds:
+            low, high = bounds.get("low"), bounds.get("high")
+            if low is not None and low == high:
+                parts.append(f"amount equal to {_money(low)}")
+            elif low is not None and high is not None:
+                parts.append(f"amount between {_money(low)} and {_money(high)}")
+            elif low is not None:
+                parts.append(f"amount {'at least' if bounds['low_inclusive'] else 'over'} {_money(low)}")
+            else:
+                parts.append(f"amount {'at most' if bounds['high_inclusive'] else 'under'} {_money(high)}")
+        if policy:
+            parts.append(f"policy {policy}")
+        return f" with {' and '.join(parts)}" if parts else ""
+
+    def _positions(self, summary: FrameSummary, bounds: dict | None, policy: str | None) -> np.ndarray | None:
+        """
+        Row positions passing the filters, in ascending amount order when an
+        amount filter is given; None if a filter can't be applied to this frame.
+        """
+        if bounds:
+            if summary.amount_col is None:
+                return None
+            start, stop = summary.span(**bounds)
+            positions = summary.order[start:stop]
+        else:
+            positions = np.arange(len(summary.df))
+        if policy:
+            policies = summary.policies()
+            if policies is None:
+                return None
+            mask = policies.str.contains(policy, regex=False).to_numpy(dtype=bool)
+            positions = positions[mask[positions]]
+        return positions
+
+    def _rows(self, df: pd.DataFrame, positions: np.ndarray, label: str) -> str:
+        if len(positions) == 0:
+            return f"No {label} records found."
+        shown = df.iloc[positions[:PREVIEW_ROWS]]
+        text = shown.to_string()
+        if len(positions) > PREVIEW_ROWS:
+            text += f"\n(showing {PREVIEW_ROWS} of {len(positions)} {label} records)"
+        return text
+
+    def _answer_frame(self, name: str, intent: str, bounds: dict | None, policy: str | None, n: int | None) -> str | None:
+        summary = self.summary(name)
+        label = FRAME_LABELS[name]
+        condition = self._describe(bounds, policy)
+        positions = self._positions(summary, bounds, policy)
+        if positions is None:
+            return None
+
+        if intent == "count":
+            count = len(positions)
+            return f"There {'is' if count == 1 else 'are'} {count} {label} record{'' if count == 1 else 's'}{condition}."
+        if intent == "list":
+            return f"{label[0].upper()}{label[1:]} records{condition}:\n" + self._rows(summary.df, np.sort(positions), label)
+
+        # Everything below works on the amount column
+        if summary.amount_col is None:
+            return None
+        if bounds and not policy:
+            start, stop = summary.span(**bounds)
+            count, total = stop - start, summary.prefix[stop] - summary.prefix[start]
+            ordered = positions
+        else:
+            ordered = positions[np.argsort(summary.amounts[positions], kind="stable")]
+            ordered = ordered[~np.isnan(summary.amounts[ordered])]
+            count, total = len(ordered), float(summary.amounts[ordered].sum())
+
+        if intent == "sum":
+            return f"The total {summary.amount_col} of the {count} {label} records{condition} is {_money(total)}."
+        if count == 0:
+            return f"No {label} records{condition} have an amount."
+        if intent == "average":
+            return f"The average {summary.amount_col} of the {count} {label} records{condition} is {_money(total / count)}."
+        if intent == "max":
+            return f"The largest {label} {summary.amount_col}{condition} is {_money(summary.amounts[ordered[-1]])}."
+        if intent == "min":
+            return f"The smallest {label} {summary.amount_col}{condition} is {_money(summary.amounts[ordered[0]])}."
+        if intent == "top":
+            picked = ordered[::-1][:n]
+            return f"Top {len(picked)} {label} records by {summary.amount_col}{condition}:\n" + self._rows(summary.df, picked, label)
+        if intent == "bottom":
+            picked = ordered[:n]
+            return f"Bottom {len(picked)} {label} records by {summary.amount_col}{condition}:\n" + self._rows(summary.df, picked, label)
+        return None
+
+    @instrumented("fast_query")
+    def answer(self, query: str) -> str | None:
+        """
+        The answer, or None unless the whole question is an intent, result
+        set, amount bounds and/or policy this engine understands.
+        """
+        text = query.lower()
+        names = self._frame_names(text)
+        if names is None:
+            return None
+
+        n = None
+        top, text = _take(_TOP, text)
+        bottom, text = (None, text) if top else _take(_BOTTOM, text)
+        if top:
+            intent, n = "top", int(top.group(1) or top.group(2))
+        elif bottom:
+            intent, n = "bottom", int(bottom.group(1) or bottom.group(2))
+        else:
+            for intent, pattern in _INTENTS:
+                match, text = _take(pattern, text)
+                if match:
+                    break
+            else:
+                return None
+
+        policy_match, text = _take(_POLICY, text)
+        policy = policy_match.group(1).upper() if policy_match else None
+        bounds, text = self._bounds(text)
+
+        # Anything left beyond filler words is a condition we'd silently ignore
+        if any(word not in _FILLER for word in re.findall(r'[a-z0-9]+', text)):
+            return None
+
+        answers = []
+        for name in names:
+            answer = self._answer_frame(name, intent, bounds, policy, n)
+            if answer is None:
+                return None
+            answers.append(answer)
+        return "\n\n".join(answers)
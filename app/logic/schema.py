@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+# Text columns with at most this share of distinct values are stored as categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+MINOR_UNITS = 100
+
+def to_minor_units(values: pd.Series) -> pd.Series:
+    """
+    Converts amounts to int64 minor units (cents), as nullable Int64.
+
+    Amounts are parsed once and scaled by 100 with a single rounding, which is
+    exact for anything quoted to two decimals below about 9e13; from then on
+    equality is integer equality, with no last-digit float drift.
+    """
+    if not pd.api.types.is_numeric_dtype(values):
+        text = values.str.replace(",", "", regex=False).str.strip()
+        values = text.where(text != "").astype(float)
+    scaled = np.round(values.to_numpy(dtype=float) * MINOR_UNITS)
+    return pd.Series(scaled, index=values.index).astype("Int64")
+
+def as_minor_units(values: pd.Series) -> pd.Series:
+    """
+    Amounts as Int64 minor units whatever the frame's schema: integer columns
+    are taken to be minor units already (as compact_frame does), anything
+    else goes through to_minor_units.
+    """
+    if pd.api.types.is_integer_dtype(values):
+        return values.astype("Int64")
+    return to_minor_units(values)
+
+def from_minor_units(values: pd.Series) -> pd.Series:
+    """
+    Back to float currency units, e.g. for display.
+    """
+    return values.astype("Float64") / MINOR_UNITS
+
+def compact_text(values: pd.Series) -> pd.Series:
+    """
+    Categorical for repetitive text, Arrow-backed strings for the rest.
+    """
+    if len(values) and values.nunique(dropna=True) <= CATEGORY_MAX_RATIO * len(values):
+        return values.astype("category")
+    return values.astype(pd.StringDtype("pyarrow"))
+
+def compact_frame(df: pd.DataFrame, amount_cols=(), date_cols: dict | None = None) -> pd.DataFrame:
+    """
+    Compact schema for a cleaned statement: amount_cols become int64 minor units
+    (integer columns are taken to be minor units already), date_cols
+    ({column: strptime format}) become datetime64, and every other text column
+    becomes categorical or Arrow strings. The amount columns are listed in
+    df.attrs['minor_unit_columns'].
+
+    The main gain is exact integer amounts. On pandas 3, where text is already
+    Arrow-backed, memory drops only modestly: about 6% for cleaned BOB and 21%
+    for cleaned RICBL synthetic statements (26.0 -> 24.3 MB and 23.3 -> 18.3 MB
+    at 200k rows).
+    """
+    date_cols = date_cols or {}
+    result = {}
+    for col in df.columns:
+        values = df[col]
+        if col in amount_cols:
+            result[col] = values if pd.api.types.is_integer_dtype(values) else to_minor_units(values)
+        elif col in date_cols:
+            result[col] = pd.to_datetime(values, format=date_cols[col], errors="coerce")
+        elif pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values):
+            result[col] = compact_text(values)
+        else:
+            result[col] = values
+    compact = pd.DataFrame(result, index=df.index, columns=df.columns)
+    compact.attrs["minor_unit_columns"] = [col for col in df.columns if col in amount_cols]
+    return compact
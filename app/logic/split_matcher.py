@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+
+from app.logic.instrumentation import instrumented
+from app.logic.matcher import parse_dates, policy_key
+from app.logic.schema import as_minor_units
+
+# One BOB credit settles at most this many RICBL entries
+MAX_PARTS = 5
+# RICBL entries searched per credit, nearest in date first; each half of the
+# search enumerates at most 2 ** (MAX_CANDIDATES // 2) subsets before pruning
+MAX_CANDIDATES = 32
+
+def _minor_units(values: pd.Series) -> np.ndarray:
+    # Compact frames already hold integer minor units; missing amounts become 0 (never eligible)
+    return as_minor_units(values).to_numpy(dtype=np.int64, na_value=0)
+
+def _subset_sums(amounts: np.ndarray, target: int, max_parts: int) -> tuple:
+    """
+    (sums, masks, counts) of every subset of amounts with at most max_parts
+    items and a sum no larger than target. Subsets grow one amount at a time
+    and a branch is dropped as soon as it overshoots, so only the feasible
+    part of the 2 ** len(amounts) subsets is ever built. Masks are uint64 up to
+    64 amounts and Python ints (object arrays) beyond, which never overflow.
+    """
+    wide = len(amounts) > 64
+    sums = np.zeros(1, dtype=np.int64)
+    masks = np.zeros(1, dtype=object if wide else np.uint64)
+    counts = np.zeros(1, dtype=np.int64)
+    for bit, amount in enumerate(amounts.tolist()):
+        keep = (sums + amount <= target) & (counts < max_parts)
+        sums = np.concatenate([sums, sums[keep] + amount])
+        masks = np.concatenate([masks, masks[keep] | (1 << bit if wide else np.uint64(1 << bit))])
+        counts = np.concatenate([counts, counts[keep] + 1])
+    return sums, masks, counts
+
+def _mask_positions(mask: int, offset: int = 0) -> list:
+    return [offset + bit for bit in range(mask.bit_length()) if mask >> bit & 1]
+
+def find_subset(amounts, target: int, max_parts: int = MAX_PARTS) -> list | None:
+    """
+    Positions of the fewest amounts (at most max_parts) that add up exactly to
+    target, or None. All amounts must be positive integers.
+
+    Meet in the middle: the subset sums of each half are enumerated with
+    pruning, the second half's are sorted (keeping the fewest parts per sum),
+    and every first-half sum is completed with one binary search.
+    """
+    amounts = np.asarray(amounts, dtype=np.int64)
+    if len(amounts) == 0 or target <= 0:
+        return None
+    # Not even the max_parts largest amounts reach the target
+    if np.sort(amounts)[-max_parts:].sum() < target:
+        return None
+
+    half = len(amounts) // 2
+    a_sums, a_masks, a_counts = _subset_sums(amounts[:half], target, max_parts)
+    b_sums, b_masks, b_counts = _subset_sums(amounts[half:], target, max_parts)
+
+    order = np.lexsort((b_counts, b_sums))
+    b_sums, b_masks, b_counts = b_sums[order], b_masks[order], b_counts[order]
+    first = np.r_[True, b_sums[1:] != b_sums[:-1]]
+    b_sums, b_masks, b_counts = b_sums[first], b_masks[first], b_counts[first]
+
+    need = target - a_sums
+    at = np.searchsorted(b_sums, need).clip(max=len(b_sums) - 1)
+    total = a_counts + b_counts[at]
+    valid = (b_sums[at] == need) & (total <= max_parts)
+    if not valid.any():
+        return None
+    best = int(np.argmin(np.where(valid, total, max_parts + 1)))
+    return _mask_positions(int(a_masks[best])) + _mask_positions(int(b_masks[at[best]]), offset=half)
+
+def _usable(df: pd.DataFrame, column: str | None) -> bool:
+    return column is not None and column in df.columns
+
+def _day_numbers(values: pd.Series) -> tuple:
+    # Whole days since the epoch, and which rows had a date at all
+    days = parse_dates(values).to_numpy(dtype="datetime64[ns]")
+    known = ~np.isnat(days)
+    return np.where(known, days.astype("datetime64[D]").astype(np.int64), 0), known
+
+@instrumented("split_match")
+def match_split_payments(bob_df: pd.DataFrame, ricb_df: pd.DataFrame, bob_amount_col: str = "CREDIT",
+                         ricb_amount_col: str = "AMOUNT", bob_date_col: str | None = "TXN DATE",
+                         ricb_date_col: str | None = "TRANSACTION\nDATE", bob_policy_col: str | None = "EXTRACTED_POLICY",
+                         ricb_policy_col: str | None = "POLICY/ ACCOUNT#", date_window_days: int | None = 3,
+                         policy_segments: int | None = 1, max_parts: int = MAX_PARTS,
+                         max_candidates: int = MAX_CANDIDATES):
+    """
+    Many-to-one matching of BOB credits that settle several RICBL entries,
+    meant for the unmatched rows left over by match_records.
+
+    Each BOB credit, in date order, is matched to the fewest (two to
+    max_parts) unconsumed RICBL entries that sum exactly to it. Candidates are
+    blocked on the first policy_segments segments of the policy (the product
+    code by default) and on dates no more than date_window_days apart; pass
+    None, or a column the frame doesn't have, to drop either block. At most
+    max_candidates entries, nearest in date first, are searched per credit.
+
+    Returns (splits, unmatched_bob, unmatched_ricb); splits holds one row per
+    RICBL entry with split_id, parts, bob_index/ricb_index and the BOB and
+    RICBL columns, suffixed '_bob'/'_ricb' where the names collide.
+    """
+    bob_amounts = _minor_units(bob_df[bob_amount_col])
+    ricb_amounts = _minor_units(ricb_df[ricb_amount_col])
+
+    use_dates = date_window_days is not None and _usable(bob_df, bob_date_col) and _usable(ricb_df, ricb_date_col)
+    if use_dates:
+        bob_days, bob_dated = _day_numbers(bob_df[bob_date_col])
+        ricb_days, ricb_dated = _day_numbers(ricb_df[ricb_date_col])
+    else:
+        bob_days, bob_dated = np.zeros(len(bob_df), dtype=np.int64), np.ones(len(bob_df), dtype=bool)
+        ricb_days, ricb_dated = np.zeros(len(ricb_df), dtype=np.int64), np.ones(len(ricb_df), dtype=bool)
+
+    use_policy = policy_segments is not None and _usable(bob_df, bob_policy_col) and _usable(ricb_df, ricb_policy_col)
+    if use_policy:
+        keys = pd.concat([
+            policy_key(bob_df[bob_policy_col].astype("string"), policy_segments),
+            policy_key(ricb_df[ricb_policy_col].astype("string"), policy_segments),
+        ], ignore_index=True)
+        codes, _ = pd.factorize(keys.where(keys != ""))
+        bob_blocks, ricb_blocks = codes[:len(bob_df)], codes[len(bob_df):]
+    else:
+        bob_blocks, ricb_blocks = np.zeros(len(bob_df), dtype=np.int64), np.zeros(len(ricb_df), dtype=np.int64)
+
+    # RICBL entries sorted by (block, date): a block is a contiguous slice and
+    # the window inside it two binary searches
+    eligible = np.flatnonzero((ricb_blocks >= 0) & (ricb_amounts > 0) & ricb_dated)
+    ricb_order = eligible[np.lexsort((ricb_days[eligible], ricb_blocks[eligible]))]
+    sorted_blocks = ricb_blocks[ricb_order]
+    sorted_days = ricb_days[ricb_order]
+    window = date_window_days if use_dates else 0
+
+    consumed = np.zeros(len(ricb_df), dtype=bool)
+    splits = []
+    bob_candidates = np.flatnonzero((bob_blocks >= 0) & (bob_amounts > 0) & bob_dated)
+    for bob_pos in bob_candidates[np.lexsort((bob_candidates, bob_days[bob_candidates]))].tolist():
+        block, day, target = bob_blocks[bob_pos], bob_days[bob_pos], bob_amounts[bob_pos]
+        lo, hi = np.searchsorted(sorted_blocks, block), np.searchsorted(sorted_blocks, block, side="right")
+        if hi - lo < 2:
+            continue
+        days = sorted_days[lo:hi]
+        lo, hi = lo + np.searchsorted(days, day - window), lo + np.searchsorted(days, day + window, side="right")
+        candidates = ricb_order[lo:hi]
+        # Exact amounts were match_records' job; a part is always smaller than the credit
+        candidates = candidates[~consumed[candidates] & (ricb_amounts[candidates] < target)]
+        if len(candidates) < 2:
+            continue
+        if len(candidates) > max_candidates:
+            nearest = np.argsort(np.abs(ricb_days[candidates] - day), kind="stable")[:max_candidates]
+            candidates = np.sort(candidates[nearest])
+        found = find_subset(ricb_amounts[candidates], int(target), max_parts)
+        if found is not None:
+            parts = candidates[found]
+            consumed[parts] = True
+            splits.append((bob_pos, parts))
+
+    splits.sort(key=lambda split: split[0])
+    bob_pos = np.asarray([pos for pos, parts in splits for _ in parts], dtype=np.int64)
+    ricb_pos = np.concatenate([parts for _, parts in splits]) if splits else np.empty(0, dtype=np.int64)
+    split_ids = np.repeat(np.arange(1, len(splits) + 1), [len(parts) for _, parts in splits]).astype(np.int64)
+    part_counts = np.repeat([len(parts) for _, parts in splits], [len(parts) for _, parts in splits]).astype(np.int64)
+
+    bob_part = bob_df.iloc[bob_pos]
+    ricb_part = ricb_df.iloc[ricb_pos]
+    matched = pd.concat(
+        [
+            pd.DataFrame({'split_id': split_ids, 'parts': part_counts,
+                          'bob_index': bob_part.index, 'ricb_index': ricb_part.index}),
+            bob_part.reset_index(drop=True).join(ricb_part.reset_index(drop=True), lsuffix='_bob', rsuffix='_ricb'),
+        ],
+        axis=1,
+    )
+
+    bob_matched = np.zeros(len(bob_df), dtype=bool)
+    bob_matched[bob_pos] = True
+    return matched, bob_df[~bob_matched], ricb_df[~consumed]
@@ -1,24 +1,28 @@
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+import numpy as np
 import pandas as pd
 
-def verify_policy_fuzzy(amount_matched_df: pd.DataFrame, policy_col_ricb: str, narration_col_bob: str, threshold: int = 85):
-    verified_matches = []
-    flagged_matches = []
+from app.logic.instrumentation import instrumented
 
-    for _, row in amount_matched_df.iterrows():
-        policy = str(row[policy_col_ricb])
-        narration = str(row[narration_col_bob])
-        score = fuzz.partial_ratio(policy, narration)
+def fuzzy_scores(policies, narrations, workers: int = -1) -> np.ndarray:
+    """
+    Scores each policy against the narration on the same row with partial_ratio,
+    in one batched call spread over all cores.
+    """
+    return process.cpdist(policies, narrations, scorer=fuzz.partial_ratio, dtype=np.float64, workers=workers)
 
-        result = row.to_dict()
-        result['Fuzzy Score'] = score
+@instrumented("fuzzy")
+def verify_policy_fuzzy(amount_matched_df: pd.DataFrame, policy_col_ricb: str, narration_col_bob: str, threshold: int = 85, workers: int = -1):
+    if amount_matched_df.empty:
+        return pd.DataFrame(), pd.DataFrame()
 
-        if score >= threshold:
-            verified_matches.append(result)
-        else:
-            flagged_matches.append(result)
+    policies = [str(value) for value in amount_matched_df[policy_col_ricb].tolist()]
+    narrations = [str(value) for value in amount_matched_df[narration_col_bob].tolist()]
 
-    verified_df = pd.DataFrame(verified_matches)
-    flagged_df = pd.DataFrame(flagged_matches)
+    scored = amount_matched_df.assign(**{'Fuzzy Score': fuzzy_scores(policies, narrations, workers=workers)})
+    verified = scored['Fuzzy Score'].to_numpy() >= threshold
+
+    verified_df = scored[verified].reset_index(drop=True)
+    flagged_df = scored[~verified].reset_index(drop=True)
 
     return verified_df, flagged_df
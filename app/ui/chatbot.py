@@ -1,14 +1,14 @@
 import streamlit as st
 import pandas as pd
-from langchain_experimental.agents import create_pandas_dataframe_agent
-import requests
-import json
+import logging
 import os
-from dotenv import load_dotenv
 import re
+import time
+from app.logic.instrumentation import instrumented, stage
+from app.logic.llm_client import DEFAULT_API_URL, LLMClient, ResponseCache, frame_fingerprint, normalize_prompt, prompt_key
+from app.logic.query_engine import FRAME_LABELS, PREVIEW_ROWS, QueryEngine
 
-# Load environment variables from .env file
-load_dotenv()
+logger = logging.getLogger("recon.chat")
 
 # Function to clean LaTeX-like syntax from the response
 def clean_latex(text: str) -> str:
@@ -19,51 +19,108 @@ def clean_latex(text: str) -> str:
     text = re.sub(r'\\[\[\]\{\}]', '', text)
     return text.strip()
 
-# DeepSeek API client using OpenRouter
+# DeepSeek API client using OpenRouter, over a pooled session with a response cache
 class DeepSeekLLM:
-    def __init__(self, api_key, site_url="http://localhost", site_name="AI Reconciliation System"):
+    def __init__(self, api_key, site_url="http://localhost", site_name="AI Reconciliation System",
+                 api_url=DEFAULT_API_URL, cache: ResponseCache | None = None):
         self.api_key = api_key
         self.site_url = site_url
         self.site_name = site_name
-        self.api_url = "https://openrouter.ai/api/v1/chat/completions"
-
-    def __call__(self, prompt, **kwargs):
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": self.site_url,
-            "X-Title": self.site_name,
-        }
-        data = {
-            "model": "deepseek/deepseek-r1-zero:free",
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        }
+        self.api_url = api_url
+        self.client = LLMClient(api_key, api_url=api_url, headers={"HTTP-Referer": site_url, "X-Title": site_name})
+        self.cache = cache or ResponseCache()
+
+    # Responses are cached on the exact prompt, or on cache_key when the caller
+    # knows a looser key (e.g. the normalized question) gives the same answer
+    @instrumented("llm")
+    def __call__(self, prompt, cache_key=None, **kwargs):
+        key = cache_key or ("prompt", prompt_key(prompt))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
         try:
-            response = requests.post(self.api_url, headers=headers, data=json.dumps(data))
-            response.raise_for_status()
-            return response.json().get("choices", [{}])[0].get("message", {}).get("content", "Error: No response from DeepSeek API")
+            content = self.client.complete(prompt)
         except Exception as e:
             return f"Error calling DeepSeek API: {str(e)}"
+        if not content:
+            return "Error: No response from DeepSeek API"
+        self.cache.put(key, content)
+        return content
+
+    def stream(self, prompt, cache_key=None):
+        """
+        Yields the response as it is generated; a cached answer comes back as one chunk.
+        Recorded as an "llm" stage whose seconds cover the whole response, with the
+        time to the first chunk as first_chunk_seconds.
+        """
+        key = cache_key or ("prompt", prompt_key(prompt))
+        with stage("llm", streamed=True, first_chunk_seconds=None) as record:
+            start = time.perf_counter()
+            cached = self.cache.get(key)
+            if cached is not None:
+                record["first_chunk_seconds"] = time.perf_counter() - start
+                yield cached
+                return
+            chunks = []
+            try:
+                for chunk in self.client.stream(prompt):
+                    if not chunks:
+                        record["first_chunk_seconds"] = time.perf_counter() - start
+                    chunks.append(chunk)
+                    yield chunk
+            except Exception as e:
+                record["error"] = str(e)
+                yield f"Error calling DeepSeek API: {str(e)}"
+                return
+            if chunks:
+                self.cache.put(key, "".join(chunks))
+
+_deepseek_llm = None
+
+# Initialize DeepSeek LLM on first use, so sessions that never chat skip .env and the HTTP stack
+def get_deepseek_llm() -> DeepSeekLLM:
+    global _deepseek_llm
+    if _deepseek_llm is None:
+        from dotenv import load_dotenv
+
+        # Load environment variables from .env file
+        load_dotenv()
+        deepseek_api_key = os.getenv("OPENROUTER_API_KEY", "your-openrouter-api-key-here")
+        _deepseek_llm = DeepSeekLLM(api_key=deepseek_api_key, api_url=os.getenv("OPENROUTER_API_URL", DEFAULT_API_URL))
+    return _deepseek_llm
 
-# Initialize DeepSeek LLM
-deepseek_api_key = os.getenv("OPENROUTER_API_KEY", "your-openrouter-api-key-here")
-print("Loaded API Key:", deepseek_api_key)
-deepseek_llm = DeepSeekLLM(api_key=deepseek_api_key)
+# Answers to data questions, keyed by (normalized question, DataFrame fingerprint)
+data_response_cache = ResponseCache()
+# Agents wrap one DataFrame each; keep the last few instead of rebuilding one per message
+data_agent_cache = ResponseCache(max_entries=8)
 
 # Initialize LangChain Pandas Agent with a single DataFrame
 def create_data_agent(df: pd.DataFrame):
+    # LangChain takes over a second to import; only data questions the fast path can't answer need it
+    from langchain_experimental.agents import create_pandas_dataframe_agent
     return create_pandas_dataframe_agent(
-        llm=deepseek_llm,
+        llm=get_deepseek_llm(),
         df=df,
         verbose=True,
         allow_dangerous_code=True
     )
 
+def get_data_agent(df: pd.DataFrame, fingerprint: str):
+    agent = data_agent_cache.get(fingerprint)
+    if agent is None:
+        agent = create_data_agent(df)
+        data_agent_cache.put(fingerprint, agent)
+    return agent
+
+# Hashing a frame is O(rows), so remember the fingerprint while the frame object is unchanged
+def get_frame_fingerprint(df: pd.DataFrame, df_name: str) -> str:
+    fingerprints = st.session_state.setdefault("frame_fingerprints", {})
+    cached = fingerprints.get(df_name)
+    if cached is None or cached[0] is not df:
+        cached = (df, frame_fingerprint(df))
+        fingerprints[df_name] = cached
+    return cached[1]
+
 # Query routing logic
 def route_query(query: str) -> str:
     query_lower = query.lower()
@@ -138,7 +195,9 @@ FAQ_CONTENT = {
         "If the file is scanned as an image, the system may not extract it correctly."
     ),
     "can i export the results": (
-        "Export functionality is coming soon! You’ll be able to download matched and unmatched records as CSV files."
+        "Yes. After matching, open '📥 Export results' below the match summary to download the matched, "
+        "split-payment and unmatched records as CSV, Parquet or Excel (one file per set, or one workbook with "
+        "a sheet per set). For headless runs, python -m app.batch writes the same sets with --format csv, parquet or xlsx."
     )
 }
 
@@ -179,6 +238,27 @@ def select_dataframe(query: str) -> pd.DataFrame:
         # Default to matched_df if no specific DataFrame is identified
         return st.session_state.matched_df, "matched_df"
 
+# One QueryEngine per match result, rebuilt only when the result frames change
+def get_query_engine() -> QueryEngine:
+    frames = {name: st.session_state[name] for name in FRAME_LABELS}
+    key = tuple(id(df) for df in frames.values())
+    if st.session_state.get("query_engine_key") != key:
+        st.session_state.query_engine = QueryEngine(frames)
+        st.session_state.query_engine_key = key
+    return st.session_state.query_engine
+
+# Chat answers list at most PREVIEW_ROWS rows; whole sets are downloaded from the export panel
+def preview_frame(df: pd.DataFrame, label: str) -> str:
+    if df.empty:
+        return f"No {label} records found."
+    text = df.head(PREVIEW_ROWS).to_string()
+    if len(df) > PREVIEW_ROWS:
+        text += (
+            f"\n(showing {PREVIEW_ROWS} of {len(df):,} {label} records; download all of them from "
+            "'📥 Export results' below the match summary)"
+        )
+    return text
+
 # Handle data-related queries using LangChain Pandas Agent
 def handle_data_query(query: str) -> str:
     # Check if DataFrames exist in session state
@@ -192,36 +272,54 @@ def handle_data_query(query: str) -> str:
         # Fallback for simple "show me all" queries
         if "show me all" in query_lower or "show all" in query_lower:
             df, df_name = select_dataframe(query)
-            print(f"Using fallback for query: {query}, DataFrame: {df_name}")  # Debug statement
+            logger.debug("Using fallback for query: %s, DataFrame: %s", query, df_name)
             if "unmatched" in query_lower and "ricbl" in query_lower:
-                return st.session_state.unmatched_ricb_df.to_string()
+                return preview_frame(st.session_state.unmatched_ricb_df, FRAME_LABELS["unmatched_ricb_df"])
             elif "unmatched" in query_lower and "bob" in query_lower:
-                return st.session_state.unmatched_bob_df.to_string()
+                return preview_frame(st.session_state.unmatched_bob_df, FRAME_LABELS["unmatched_bob_df"])
             elif "matched" in query_lower:
-                return st.session_state.matched_df.to_string()
+                return preview_frame(st.session_state.matched_df, FRAME_LABELS["matched_df"])
         
+        # Answer common count/sum/top-N questions locally before involving the LLM
+        fast_answer = get_query_engine().answer(query)
+        if fast_answer is not None:
+            return fast_answer
+
         # Use LangChain Pandas Agent for other queries
-        print(f"Using LangChain Pandas Agent for query: {query}")  # Debug statement
+        logger.debug("Using LangChain Pandas Agent for query: %s", query)
         df, df_name = select_dataframe(query)
-        agent = create_data_agent(df)
+        fingerprint = get_frame_fingerprint(df, df_name)
+        cache_key = (normalize_prompt(query), fingerprint)
+        cached = data_response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        agent = get_data_agent(df, fingerprint)
         response = agent.run(query)
         
-        # If the response is a DataFrame, convert it to a string for display
+        # If the response is a DataFrame, show its first rows for display
         if isinstance(response, pd.DataFrame):
-            return response.to_string()
-        return str(response)
+            response = preview_frame(response, "result")
+        response = str(response)
+        data_response_cache.put(cache_key, response)
+        return response
     except Exception as e:
         return f"Error processing data query: {str(e)}"
 
+def general_cache_key(query: str) -> tuple:
+    # The question is the only free text in GENERAL_PROMPT, so its normalized form keys the answer
+    return ("general", normalize_prompt(query))
+
+GENERAL_PROMPT = "Answer the following question in a concise and informative way, using plain text without any LaTeX or special formatting:\n{query}"
+
 # Handle general queries using DeepSeek API via OpenRouter
 def handle_general_query(query: str) -> str:
     try:
-        prompt = f"Answer the following question in a concise and informative way, using plain text without any LaTeX or special formatting:\n{query}"
-        response = deepseek_llm(prompt)
-        print("Raw DeepSeek Response:", response)
+        response = get_deepseek_llm()(GENERAL_PROMPT.format(query=query), cache_key=general_cache_key(query))
+        logger.debug("Raw DeepSeek response: %s", response)
         # Clean the response to remove LaTeX (as a fallback)
         cleaned_response = clean_latex(response)
-        print("Cleaned Response:", cleaned_response)
+        logger.debug("Cleaned response: %s", cleaned_response)
         return cleaned_response.strip()
     except Exception as e:
         return f"Error processing general query: {str(e)}"
@@ -235,4 +333,12 @@ def process_query(query: str) -> str:
     elif query_type == "data":
         return handle_data_query(query)
     else:
-        return handle_general_query(query)
\ No newline at end of file
+        return handle_general_query(query)
+
+# Streaming variant for the chat UI: general questions arrive token by token,
+# everything else as a single chunk
+def stream_query(query: str):
+    if route_query(query) == "general":
+        yield from get_deepseek_llm().stream(GENERAL_PROMPT.format(query=query), cache_key=general_cache_key(query))
+    else:
+        yield process_query(query)
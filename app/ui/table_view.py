@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+def filter_positions(df: pd.DataFrame, text: str, column: int | None = None, search_text: pd.Series | None = None) -> np.ndarray:
+    """
+    Row positions whose cell (or, with column=None, any cell) contains text, case-insensitively.
+    """
+    if not text:
+        return np.arange(len(df))
+    if column is None:
+        haystack = search_text if search_text is not None else row_search_text(df)
+    else:
+        haystack = df.iloc[:, column].astype(str).str.lower()
+    return np.flatnonzero(haystack.str.contains(text.lower(), regex=False).to_numpy(dtype=bool))
+
+def row_search_text(df: pd.DataFrame) -> pd.Series:
+    """
+    Every row's cells joined and lower-cased, built once per frame for "all columns" filters.
+    """
+    if df.shape[1] == 0:
+        return pd.Series("", index=range(len(df)))
+    text = df.astype(str)
+    joined = text.iloc[:, 0].str.cat([text.iloc[:, i] for i in range(1, text.shape[1])], sep="\x1f")
+    return joined.str.lower().reset_index(drop=True)
+
+def sort_positions(df: pd.DataFrame, positions: np.ndarray, column: int, ascending: bool = True) -> np.ndarray:
+    """
+    positions reordered by one column (stable, missing values last).
+    """
+    values = df.iloc[positions, column].reset_index(drop=True)
+    try:
+        order = values.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+    except TypeError:
+        # Mixed types in a raw column: fall back to text order
+        order = values.astype(str).sort_values(ascending=ascending, kind="stable").index.to_numpy()
+    return positions[order]
+
+def column_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per column: dtype, non-null and distinct counts, and min/max/mean for numeric columns.
+    """
+    rows = []
+    for i, col in enumerate(df.columns):
+        values = df.iloc[:, i]
+        row = {
+            "column": str(col),
+            "dtype": str(values.dtype),
+            "non_null": int(values.notna().sum()),
+            "distinct": int(values.nunique(dropna=True)),
+            "min": None, "max": None, "mean": None,
+        }
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            row.update(min=values.min(), max=values.max(), mean=values.mean())
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def _state(key: str, df: pd.DataFrame, frame_id=None) -> dict:
+    # Derived data for one table, dropped whenever the frame changes: the frame object
+    # itself, or frame_id when the same data comes back as a new object every rerun
+    state = st.session_state.get(f"_table_{key}")
+    same = state is not None and (state["frame"] is df if frame_id is None else state["frame_id"] == frame_id)
+    if not same:
+        state = {"frame": df if frame_id is None else None, "frame_id": frame_id, "views": {}}
+        st.session_state[f"_table_{key}"] = state
+    return state
+
+def render_table(df: pd.DataFrame, key: str, page_size: int = 50, frame_id=None):
+    """
+    Paged st.dataframe: filtering, sorting and paging happen here and only the
+    visible page is sent to the browser. Filter/sort results and the column
+    summary are cached per frame, so paging through a result is just an iloc.
+    Pass a hashable frame_id (e.g. the file digest) for frames that are
+    reloaded as new objects on each rerun, such as those from StatementCache.
+    """
+    state = _state(key, df, frame_id)
+    columns = list(range(df.shape[1]))
+
+    c1, c2, c3, c4 = st.columns([2, 3, 2, 1])
+    with c1:
+        filter_col = st.selectbox("Filter column", [None] + columns, key=f"{key}_filter_col",
+                                  format_func=lambda i: "All columns" if i is None else str(df.columns[i]))
+    with c2:
+        filter_text = st.text_input("Contains", key=f"{key}_filter_text").strip()
+    with c3:
+        sort_col = st.selectbox("Sort by", [None] + columns, key=f"{key}_sort_col",
+                                format_func=lambda i: "Original order" if i is None else str(df.columns[i]))
+    with c4:
+        descending = st.checkbox("Descending", key=f"{key}_descending")
+
+    view_key = (filter_col, filter_text, sort_col, descending)
+    positions = state["views"].get(view_key)
+    if positions is None:
+        search_text = None
+        if filter_text and filter_col is None:
+            if "search_text" not in state:
+                state["search_text"] = row_search_text(df)
+            search_text = state["search_text"]
+        positions = filter_positions(df, filter_text, filter_col, search_text)
+        if sort_col is not None:
+            positions = sort_positions(df, positions, sort_col, ascending=not descending)
+        # A handful of recent views is plenty; each holds one int array
+        if len(state["views"]) >= 8:
+            state["views"].pop(next(iter(state["views"])))
+        state["views"][view_key] = positions
+
+    size_key = f"{key}_page_size"
+    if size_key not in st.session_state:
+        st.session_state[size_key] = page_size if page_size in PAGE_SIZES else PAGE_SIZES[0]
+    size = st.session_state[size_key]
+    pages = max(1, -(-len(positions) // size))
+    page_key = f"{key}_page"
+    # Keep the page in range when a filter shrinks the result
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+
+    page = st.session_state.get(page_key, 1)
+    start = (page - 1) * size
+    st.dataframe(df.iloc[positions[start:start + size]], use_container_width=True)
+
+    p1, p2, p3 = st.columns([1, 1, 3])
+    with p1:
+        st.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+    with p2:
+        st.selectbox("Rows per page", PAGE_SIZES, key=size_key)
+    with p3:
+        shown = f"Rows {start + 1:,}–{min(start + size, len(positions)):,} of {len(positions):,}" if len(positions) else "No rows"
+        if len(positions) != len(df):
+            shown += f" (filtered from {len(df):,})"
+        st.caption(shown)
+
+    if st.toggle("Column summary", key=f"{key}_summary"):
+        if "summary" not in state:
+            state["summary"] = column_summary(df)
+        st.dataframe(state["summary"], use_container_width=True, hide_index=True)
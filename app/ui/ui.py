@@ -1,17 +1,103 @@
 import streamlit as st
-from app.logic.extractor import extract_tables_from_pdf
+from app.logic.cache import StatementCache, pdf_digest
+from app.logic.candidates import with_best_counterpart
 from app.logic.cleaner import clean_bob_data, clean_ricb_data
-from app.ui.chatbot import process_query
+from app.logic.export import EXPORT_FORMATS, available_formats, export_bytes
+from app.logic.instrumentation import StageRecorder, enable_json_log, use_recorder
+from app.logic.matcher import match_records
+from app.logic.split_matcher import match_split_payments
+from app.ui.table_view import render_table
 import html
+import pandas as pd
+import os
+
+# Match results remembered per session, one per (files, column pair)
+MATCH_RESULTS_KEPT = 4
 
 def load_css(file_path="app/ui/style.css"):
     with open(file_path) as f:
         st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
+@st.cache_resource
+def get_statement_cache() -> StatementCache:
+    return StatementCache()
+
+@st.cache_resource
+def get_ledger():
+    # SQLAlchemy is only needed once someone saves to the ledger
+    from app.logic.ledger import ReconciliationLedger
+    return ReconciliationLedger()
+
+def render_performance_panel(recorder: StageRecorder):
+    with st.expander("⏱️ Performance", expanded=False):
+        if not recorder.records:
+            st.caption("No stages recorded yet.")
+            return
+        records = recorder.to_dataframe()
+        latest = records[records["run"] == recorder.run_id]
+        st.markdown("### This run")
+        st.dataframe(latest, use_container_width=True)
+        st.markdown("### History")
+        st.dataframe(records.iloc[::-1], use_container_width=True)
+        st.download_button(
+            "⬇️ Download JSON log",
+            recorder.to_json(),
+            file_name="reconciliation_performance.json",
+            mime="application/json",
+        )
+
+EXPORT_LABELS = {
+    "matched": "✅ Matched",
+    "split_payments": "🧩 Split payments",
+    "unmatched_bob": "❌ Unmatched BOB",
+    "unmatched_ricb": "❌ Unmatched RICBL",
+}
+
+def render_export_panel(frames: dict):
+    # Files are only written when a button is clicked, chunk by chunk through a temporary file
+    with st.expander("📥 Export results", expanded=False):
+        formats = available_formats()
+        fmt = st.radio("Format", formats, horizontal=True, key="export_format", format_func=str.upper)
+        mime, extension = EXPORT_FORMATS[fmt]
+        columns = st.columns(len(frames) + (fmt == "xlsx"))
+        for column, (name, df) in zip(columns, frames.items()):
+            with column:
+                st.download_button(
+                    f"{EXPORT_LABELS.get(name, name)} ({len(df):,})",
+                    data=lambda df=df: export_bytes(df, fmt),
+                    file_name=f"reconciliation_{name}.{extension}",
+                    mime=mime,
+                    key=f"export_{name}",
+                    on_click="ignore",
+                )
+        if fmt == "xlsx":
+            with columns[-1]:
+                st.download_button(
+                    "📚 All sets (one workbook)",
+                    data=lambda: export_bytes(frames, "xlsx"),
+                    file_name="reconciliation.xlsx",
+                    mime=mime,
+                    key="export_all",
+                    on_click="ignore",
+                )
+
 def render_ui():
     st.set_page_config(layout="wide")
     load_css()
-    
+
+    # Per-session stage timings; set RECON_PERF_LOG to also write them as JSON lines
+    if os.getenv("RECON_PERF_LOG"):
+        enable_json_log(os.getenv("RECON_PERF_LOG"))
+    if "perf_recorder" not in st.session_state:
+        st.session_state.perf_recorder = StageRecorder()
+    recorder = st.session_state.perf_recorder
+    recorder.new_run()
+
+    with use_recorder(recorder):
+        render_dashboard()
+    render_performance_panel(recorder)
+
+def render_dashboard():
     st.title("📊 AI Reconciliation System")
 
     # Initialize session state for chat and matching
@@ -25,6 +111,11 @@ def render_ui():
         st.header("📂 Upload Files")
         bob_file = st.file_uploader("Upload BOB PDF", type=["pdf"], key="bob_pdf")
         ricb_file = st.file_uploader("Upload RICBL PDF", type=["pdf"], key="ricb_pdf")
+        compact = st.toggle(
+            "🗜️ Compact schema", key="compact_schema",
+            help="Amounts as exact integer cents, dates as real dates and repetitive text as categories: "
+                 "amount matching has no float rounding, and the cleaned tables take roughly 5-20% less memory.",
+        )
 
         # Chat section in the sidebar
         with st.expander("💬 Chat with Assistant", expanded=False):
@@ -45,12 +136,19 @@ def render_ui():
             # Chat input
             user_input = st.chat_input("Ask me anything...", key="chat_input")
             if user_input:
+                # The chatbot module (and the LLM stack behind it) loads on the first question
+                from app.ui.chatbot import clean_latex, stream_query
+
                 # Add user message to history
                 st.session_state.chat_history.append({"role": "user", "content": user_input})
                 
-                # Process the query using the chatbot logic
-                bot_response = process_query(user_input)
-                st.session_state.chat_history.append({"role": "assistant", "content": bot_response})
+                # Process the query using the chatbot logic, showing the answer as it streams in
+                with chat_container:
+                    with st.chat_message("user"):
+                        st.markdown(f'<div class="chat-message user">{html.escape(user_input)}</div>', unsafe_allow_html=True)
+                    with st.chat_message("assistant"):
+                        bot_response = st.write_stream(stream_query(user_input))
+                st.session_state.chat_history.append({"role": "assistant", "content": clean_latex(str(bot_response))})
 
                 # Rerun to update the chat window
                 st.rerun()
@@ -59,26 +157,30 @@ def render_ui():
     if not bob_file or not ricb_file:
         st.info("⬅️ Please upload both BOB and RICBL PDF files to continue.")
     else:
-        bob_raw_df = extract_tables_from_pdf(bob_file)
-        ricb_raw_df = extract_tables_from_pdf(ricb_file)  # Fixed typo: rocob_raw_df -> ricb_raw_df
-        bob_df = clean_bob_data(bob_raw_df)
-        ricb_df = clean_ricb_data(ricb_raw_df)
+        # Reruns hit the on-disk cache: one hash and one Parquet read per statement
+        cache = get_statement_cache()
+        bob_digest = pdf_digest(bob_file)
+        ricb_digest = pdf_digest(ricb_file)
+        bob_df = cache.load_clean(bob_file, clean_bob_data, digest=bob_digest, workers=None, compact=compact)
+        ricb_df = cache.load_clean(ricb_file, clean_ricb_data, digest=ricb_digest, workers=None, compact=compact)
 
         view = st.radio("🔀 Select View Mode", ["📄 Raw Data", "🧹 Cleaned Tables", "🔁 Exact Matching"], horizontal=True)
 
         if view == "📄 Raw Data":
+            bob_raw_df = cache.load_raw(bob_file, digest=bob_digest, workers=None)
+            ricb_raw_df = cache.load_raw(ricb_file, digest=ricb_digest, workers=None)
             st.subheader("📄 Raw Extracted Tables")
             st.markdown("### 🧾 BOB Raw Table")
-            st.dataframe(bob_raw_df, use_container_width=True)
+            render_table(bob_raw_df, "bob_raw", frame_id=(bob_digest, "raw"))
             st.markdown("### 🧾 RICBL Raw Table")
-            st.dataframe(ricb_raw_df, use_container_width=True)
+            render_table(ricb_raw_df, "ricb_raw", frame_id=(ricb_digest, "raw"))
 
         elif view == "🧹 Cleaned Tables":
             st.subheader("🧹 Cleaned Tables")
             st.markdown("### ✅ BOB Cleaned Table")
-            st.dataframe(bob_df, use_container_width=True)
+            render_table(bob_df, "bob_clean", frame_id=(bob_digest, "clean", compact))
             st.markdown("### ✅ RICBL Cleaned Table")
-            st.dataframe(ricb_df, use_container_width=True)
+            render_table(ricb_df, "ricb_clean", frame_id=(ricb_digest, "clean", compact))
 
         elif view == "🔁 Exact Matching":
             st.subheader("🔁 Exact Matching Options")
@@ -94,9 +196,26 @@ def render_ui():
                 st.session_state.ricb_match_col = ricb_match_col
 
             if st.session_state.match_started:
-                matched = bob_df[bob_df[st.session_state.bob_match_col].isin(ricb_df[st.session_state.ricb_match_col])]
-                unmatched_bob = bob_df[~bob_df[st.session_state.bob_match_col].isin(ricb_df[st.session_state.ricb_match_col])]
-                unmatched_ricb = ricb_df[~ricb_df[st.session_state.ricb_match_col].isin(bob_df[st.session_state.bob_match_col])]
+                # Keep results per (files, schema, columns): switching views or back to a column pair never re-matches
+                match_key = (bob_digest, ricb_digest, compact, st.session_state.bob_match_col, st.session_state.ricb_match_col)
+                match_results = st.session_state.setdefault("match_results", {})
+                if match_key not in match_results:
+                    if len(match_results) >= MATCH_RESULTS_KEPT:
+                        match_results.pop(next(iter(match_results)))
+                    matched, unmatched_bob, unmatched_ricb = match_records(
+                        bob_df, ricb_df, st.session_state.bob_match_col, st.session_state.ricb_match_col
+                    )
+                    splits = None
+                    # Split payments only make sense when matching on amounts
+                    if (pd.api.types.is_numeric_dtype(bob_df[st.session_state.bob_match_col])
+                            and pd.api.types.is_numeric_dtype(ricb_df[st.session_state.ricb_match_col])):
+                        splits, unmatched_bob, unmatched_ricb = match_split_payments(
+                            unmatched_bob, unmatched_ricb, st.session_state.bob_match_col, st.session_state.ricb_match_col
+                        )
+                    # Point each leftover RICBL entry at the unmatched BOB row whose policy it resembles most
+                    unmatched_ricb = with_best_counterpart(unmatched_ricb, unmatched_bob)
+                    match_results[match_key] = (matched, splits, unmatched_bob, unmatched_ricb)
+                matched, splits, unmatched_bob, unmatched_ricb = match_results[match_key]
 
                 # Store DataFrames in session state for chatbot access
                 st.session_state.matched_df = matched
@@ -112,17 +231,38 @@ def render_ui():
                 with c3:
                     st.markdown(f"<div class='stat-card green'><h3>✅ Matched</h3><h2>{len(matched)}</h2></div>", unsafe_allow_html=True)
 
-                c4, c5 = st.columns(2)
+                c4, c5, c6 = st.columns(3)
                 with c4:
-                    st.markdown(f"<div class='stat-card red'><h3>❌ Unmatched in BOB</h3><h2>{len(unmatched_bob)}</h2></div>", unsafe_allow_html=True)
+                    split_count = splits["split_id"].nunique() if splits is not None else 0
+                    st.markdown(f"<div class='stat-card green'><h3>🧩 Split Payments</h3><h2>{split_count}</h2></div>", unsafe_allow_html=True)
                 with c5:
+                    st.markdown(f"<div class='stat-card red'><h3>❌ Unmatched in BOB</h3><h2>{len(unmatched_bob)}</h2></div>", unsafe_allow_html=True)
+                with c6:
                     st.markdown(f"<div class='stat-card red'><h3>❌ Unmatched in RICBL</h3><h2>{len(unmatched_ricb)}</h2></div>", unsafe_allow_html=True)
 
                 with st.expander("✅ Matched Records"):
-                    st.dataframe(matched, use_container_width=True)
+                    render_table(matched, "matched")
+
+                if splits is not None and not splits.empty:
+                    with st.expander("🧩 Split Payments (one BOB credit, several RICBL entries)"):
+                        render_table(splits, "splits")
 
                 with st.expander("❌ Unmatched BOB Records"):
-                    st.dataframe(unmatched_bob, use_container_width=True)
+                    render_table(unmatched_bob, "unmatched_bob")
 
                 with st.expander("❌ Unmatched RICBL Records"):
-                    st.dataframe(unmatched_ricb, use_container_width=True)
\ No newline at end of file
+                    render_table(unmatched_ricb, "unmatched_ricb")
+
+                export_frames = {"matched": matched}
+                if splits is not None:
+                    export_frames["split_payments"] = splits
+                export_frames.update(unmatched_bob=unmatched_bob, unmatched_ricb=unmatched_ricb)
+                render_export_panel(export_frames)
+
+                if st.button("💾 Save to Ledger"):
+                    # Only rows not already in the ledger are stored and matched against its open items
+                    result = get_ledger().ingest_and_reconcile(bob_df, ricb_df, source=f"{bob_digest[:12]}/{ricb_digest[:12]}")
+                    st.success(
+                        f"Ledger updated: {result['new_bob']} new BOB rows, {result['new_ricb']} new RICBL rows, "
+                        f"{result['matched']} new matches."
+                    )
\ No newline at end of file
@@ -0,0 +1,37 @@
+"""
+Compares two benchmarks.run reports stage by stage.
+
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import json
+
+def _key(record: dict) -> tuple:
+    return tuple(sorted((k, v) for k, v in record.items() if k not in ("rows_in", "rows_out", "seconds", "peak_mb")))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args(argv)
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"before: {before.get('commit')}  after: {after.get('commit')}")
+    print(f"{'stage':<32} {'before s':>10} {'after s':>10} {'speedup':>8} {'before MB':>10} {'after MB':>10}")
+    baseline = {_key(record): record for record in before["results"]}
+    for record in after["results"]:
+        old = baseline.get(_key(record))
+        if old is None:
+            continue
+        label = " ".join(str(v) for k, v in _key(record))
+        print(
+            f"{label:<32} {old['seconds']:>10.4f} {record['seconds']:>10.4f} "
+            f"{old['seconds'] / record['seconds']:>7.2f}x {old['peak_mb']:>10.1f} {record['peak_mb']:>10.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
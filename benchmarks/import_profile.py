@@ -0,0 +1,105 @@
+"""
+Import-time profile of the app's cold start.
+
+    python -m benchmarks.import_profile
+    python -m benchmarks.import_profile app.ui.chatbot app.logic.ledger --top 15 -o imports.json
+    python -m benchmarks.import_profile --first-paint
+
+Each module is imported in a fresh interpreter under -X importtime (best of
+--repeat runs) and the report lists the total plus the slowest top-level
+packages by cumulative time. --first-paint also times a headless run of
+main.py through streamlit.testing.AppTest, i.e. script start to first render
+with no files uploaded.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_FIRST_PAINT = (
+    "import time\n"
+    "from streamlit.testing.v1 import AppTest\n"
+    "at = AppTest.from_file('main.py', default_timeout=120)\n"
+    "start = time.perf_counter()\n"
+    "at.run()\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+def profile_import(module: str) -> dict:
+    """
+    One fresh-interpreter import of module: wall time and per-module
+    (self, cumulative) microseconds from -X importtime.
+    """
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    total = next((m["cumulative_us"] for m in reversed(modules) if m["module"] == module), None)
+    return {"module": module, "wall_seconds": wall, "import_seconds": total / 1e6 if total else None, "modules": modules}
+
+def top_packages(modules: list, top: int, exclude: str = "") -> list:
+    # Cumulative time of each first import of a top-level package, wherever it happened in the tree
+    packages = {}
+    for m in modules:
+        package = m["module"].split(".")[0]
+        if package == m["module"] and package != exclude:
+            packages[package] = max(packages.get(package, 0), m["cumulative_us"])
+    return sorted(packages.items(), key=lambda item: -item[1])[:top]
+
+def first_paint() -> float:
+    proc = subprocess.run([sys.executable, "-c", _FIRST_PAINT], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(proc.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=["main"], help="modules to import (default: main)")
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level packages to list")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--first-paint", action="store_true", help="also time main.py to first render")
+    parser.add_argument("-o", "--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    report = {"python": sys.version.split()[0], "imports": []}
+    for module in args.modules:
+        runs = [profile_import(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run["import_seconds"] or float("inf"))
+        packages = top_packages(best["modules"], args.top, exclude=module)
+        print(f"{module}: import {best['import_seconds']:.3f}s (interpreter + import {best['wall_seconds']:.3f}s)")
+        for package, cumulative_us in packages:
+            print(f"    {package:<28} {cumulative_us / 1e6:8.3f}s")
+        report["imports"].append({
+            "module": module,
+            "import_seconds": best["import_seconds"],
+            "wall_seconds": best["wall_seconds"],
+            "top_packages": [{"package": p, "seconds": us / 1e6} for p, us in packages],
+        })
+
+    if args.first_paint:
+        seconds = min(first_paint() for _ in range(args.repeat))
+        print(f"main.py first paint: {seconds:.3f}s")
+        report["first_paint_seconds"] = seconds
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Per-stage time and peak memory for the reconciliation pipeline.
+
+    python -m benchmarks.run --sizes 1000 10000 100000 -o bench.json
+    python -m benchmarks.compare before.json after.json
+
+Extraction is timed on sample_data/*.pdf; cleaning, matching and fuzzy
+scoring run on seeded synthetic statements of each size. Every stage is
+timed (best of --repeat runs, untraced) and then run once more under
+tracemalloc for its peak allocation, which covers pandas/numpy buffers but
+not pyarrow's own memory pool.
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from app.logic.extractor import extract_tables_from_pdf
+from app.logic.cleaner import clean_bob_data, clean_ricb_data
+from app.logic.layouts import detect_profile
+from app.logic.pipeline import stream_to_parquet
+from app.logic.matcher import match_records
+from app.logic.split_matcher import match_split_payments
+from app.logic.verify_policy_fuzzy import verify_policy_fuzzy
+from app.logic.candidates import best_counterparts
+from benchmarks.synthetic import make_statements
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_data")
+
+def measure(stage: str, fn, repeat: int, rows_in: int, **params) -> tuple:
+    """
+    Returns (record, result) where result is fn()'s output from the last run.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rows_out = len(result[0]) if isinstance(result, tuple) else len(result)
+    record = {
+        "stage": stage,
+        **params,
+        "rows_in": rows_in,
+        "rows_out": rows_out,
+        "seconds": best,
+        "peak_mb": peak / 2**20,
+    }
+    print(f"{stage:<12} {json.dumps(params):<40} {best:9.4f}s {peak / 2**20:9.1f} MB", file=sys.stderr, flush=True)
+    return record, result
+
+def bench_extraction(repeat: int, workers: list) -> list:
+    records = []
+    for path in sorted(glob.glob(os.path.join(SAMPLE_DIR, "*.pdf"))):
+        # The pool only serves generic detection, so only that run is repeated per worker count
+        for profile, worker_counts in (("auto", [1]), (None, workers)):
+            for worker_count in worker_counts:
+                record, _ = measure(
+                    "extract",
+                    lambda: extract_tables_from_pdf(path, workers=worker_count, min_parallel_pages=1, profile=profile),
+                    repeat,
+                    rows_in=0,
+                    file=os.path.basename(path),
+                    profile=profile or "generic",
+                    workers=worker_count,
+                )
+                records.append(record)
+    return records
+
+def _repeated_pdf(path: str, copies: int) -> bytes:
+    # A longer statement of the same layout: every page of path, copies times over
+    import pypdfium2 as pdfium
+
+    source = pdfium.PdfDocument(path)
+    document = pdfium.PdfDocument.new()
+    for _ in range(copies):
+        document.import_pages(source)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    document.close()
+    source.close()
+    return buffer.getvalue()
+
+def bench_streaming(repeat: int, copies: list) -> list:
+    """
+    Extract + clean in memory against the table-by-table stream into Parquet,
+    on sample statements repeated to grow the page count. The in-memory peak
+    grows with the pages; the streamed one stays near a single table's, plus
+    whatever pages of generic fallback detection leave for the cycle collector.
+    """
+    cleaners = {"bob": clean_bob_data, "ricb": clean_ricb_data}
+    records = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for path in sorted(glob.glob(os.path.join(SAMPLE_DIR, "*.pdf"))):
+            layout = detect_profile(path)
+            if layout is None:
+                continue
+            kind, clean = layout.name, cleaners[layout.name]
+            parquet_path = os.path.join(out_dir, f"{kind}.parquet")
+            for count in copies:
+                pdf = _repeated_pdf(path, count)
+                params = {"file": os.path.basename(path), "copies": count}
+                record, _ = measure(
+                    "extract_clean", lambda: clean(extract_tables_from_pdf(pdf)), repeat, rows_in=0, **params,
+                )
+                records.append(record)
+                record, rows = measure(
+                    "stream_clean", lambda: [stream_to_parquet(pdf, kind, parquet_path)], repeat, rows_in=0, **params,
+                )
+                record["rows_out"] = rows[0]
+                records.append(record)
+    return records
+
+def bench_size(rows: int, repeat: int, seed: int, match_ratio: float, mismatch_ratio: float,
+               split_ratio: float = 0.0) -> list:
+    bob_raw, ricb_raw = make_statements(rows, match_ratio=match_ratio, policy_mismatch_ratio=mismatch_ratio, seed=seed,
+                                        split_ratio=split_ratio)
+    params = {"size": rows}
+    records = []
+
+    record, bob_df = measure("clean_bob", lambda: clean_bob_data(bob_raw.copy()), repeat, len(bob_raw), **params)
+    records.append(record)
+    record, ricb_df = measure("clean_ricb", lambda: clean_ricb_data(ricb_raw.copy()), repeat, len(ricb_raw), **params)
+    records.append(record)
+
+    record, (matched, unmatched_bob, unmatched_ricb) = measure(
+        "match", lambda: match_records(bob_df, ricb_df, "CREDIT", "AMOUNT"),
+        repeat, len(bob_df) + len(ricb_df), **params,
+    )
+    records.append(record)
+
+    record, _ = measure(
+        "split_match", lambda: match_split_payments(unmatched_bob, unmatched_ricb),
+        repeat, len(unmatched_bob) + len(unmatched_ricb), **params,
+    )
+    records.append(record)
+
+    record, _ = measure(
+        "fuzzy", lambda: verify_policy_fuzzy(matched, "POLICY/ ACCOUNT#", "NARRATION"),
+        repeat, len(matched), **params,
+    )
+    records.append(record)
+
+    record, _ = measure(
+        "candidates", lambda: best_counterparts(unmatched_ricb, unmatched_bob, "POLICY/ ACCOUNT#"),
+        repeat, len(unmatched_bob) + len(unmatched_ricb), **params,
+    )
+    records.append(record)
+    return records
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(SAMPLE_DIR),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--match-ratio", type=float, default=0.8)
+    parser.add_argument("--mismatch-ratio", type=float, default=0.05)
+    parser.add_argument("--split-ratio", type=float, default=0.1, help="share of unmatched rows that are split payments")
+    parser.add_argument("--extract-workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--skip-extract", action="store_true")
+    parser.add_argument("--stream-copies", type=int, nargs="+", default=[1, 10],
+                        help="times each sample statement is repeated for the streaming comparison")
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = []
+    if not args.skip_extract:
+        results.extend(bench_extraction(args.repeat, sorted(set(args.extract_workers))))
+        results.extend(bench_streaming(args.repeat, args.stream_copies))
+    for rows in args.sizes:
+        results.extend(bench_size(rows, args.repeat, args.seed, args.match_ratio, args.mismatch_ratio, args.split_ratio))
+
+    report = {
+        "commit": _git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "cpus": os.cpu_count(),
+        "params": vars(args),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Local OpenAI-compatible chat completions stub, for exercising the chatbot's
+LLM client (pooling, timeouts, streaming, response cache) without a network.
+
+    python -m benchmarks.stub_llm_server --port 8765 --latency 0.5
+    OPENROUTER_API_URL=http://127.0.0.1:8765/v1/chat/completions streamlit run main.py
+
+Every reply echoes the last user message; with "stream": true it is sent as
+server-sent events, one word per chunk. GET /stats returns the number of
+requests and of distinct TCP connections seen, which shows keep-alive reuse.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    token_delay = 0.0
+    stats = {"requests": 0, "connections": 0}
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with self.lock:
+            self.stats["connections"] += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, body: dict, status: int = 200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_chunk(self, text: str):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with self.lock:
+                self._send_json(dict(self.stats))
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        with self.lock:
+            self.stats["requests"] += 1
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        messages = body.get("messages") or [{}]
+        reply = f"Stub answer to: {messages[-1].get('content', '')}"
+        time.sleep(self.latency)
+
+        if not body.get("stream"):
+            self._send_json({
+                "id": "stub", "object": "chat.completion", "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, word in enumerate(reply.split(" ")):
+            delta = {"content": word if i == 0 else " " + word}
+            event = {"id": "stub", "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": delta}]}
+            self._send_chunk(f"data: {json.dumps(event)}\n\n")
+            time.sleep(self.token_delay)
+        self._send_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+def serve(port: int = 8765, latency: float = 0.0, token_delay: float = 0.0) -> ThreadingHTTPServer:
+    """
+    Starts the stub on a background thread and returns the server (call shutdown() to stop).
+    """
+    handler = type("Handler", (StubHandler,), {
+        "latency": latency, "token_delay": token_delay,
+        "stats": {"requests": 0, "connections": 0}, "lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each reply starts")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    args = parser.parse_args()
+    server = serve(args.port, args.latency, args.token_delay)
+    print(f"Stub LLM listening on http://127.0.0.1:{server.server_port}/v1/chat/completions")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
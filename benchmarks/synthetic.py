@@ -0,0 +1,110 @@
+"""
+Seeded synthetic BOB and RICBL statements, shaped like extract_tables_from_pdf output.
+"""
+import numpy as np
+import pandas as pd
+
+BOB_COLUMNS = ['SL.NO', 'TXN DATE', 'JOURNAL NO', 'TRAN DESC', 'NARRATION', 'DEBIT', 'CREDIT', 'BALANCE']
+RICB_COLUMNS = [
+    'ID#', 'POLICY/ ACCOUNT#', 'CUSTOMER\nCID#', 'CUSTOMER\nNAME', 'DEPARTMENT', 'AMOUNT', 'REMITTER\nACC#',
+    'TRANSACTION\nID', 'TRANSACTION\nDATE', 'TRANSACTION\nSTATUS', 'ERR LOG', 'JOURNAL\nNO',
+]
+
+SCHEMES = np.array([
+    'PLCONSUME1', 'CDL', 'BLTERM1', 'BLGENTRDOD', 'BLOD1', 'TLHVTRUCK2', 'PFSLOTHER2', 'EIS', 'PLHOUSE2', 'GLGOLD1',
+])
+SUFFIXES = np.array(['loan repayment', 'Card\nloan', 'f\nif loan', 'Loan', 'premium', 'EMI'])
+NAMES = np.array(['JAMYANG\nCHODEN', 'TSHERING\nDEMA', 'TSHEWANG\nPEMO', 'DENKAR', 'CHODEN', 'KARMA\nWANGDI', 'SONAM'])
+OTHER_NARRATIONS = np.array(['QR:Ricb bg\nchehy', 'ATM CASH DEPOSIT', 'NEFT INWARD', 'MBOB TRANSFER'])
+
+def _policies(rng: np.random.Generator, rows: int) -> pd.Series:
+    return (
+        pd.Series(SCHEMES[rng.integers(0, len(SCHEMES), rows)])
+        + '/' + pd.Series(rng.integers(2005, 2026, rows)).astype(str)
+        + '/' + pd.Series(rng.integers(1, 100_000, rows)).astype(str)
+    )
+
+def make_statements(rows: int, match_ratio: float = 0.8, policy_mismatch_ratio: float = 0.05,
+                    seed: int = 0, split_ratio: float = 0.0) -> tuple:
+    """
+    Returns raw (bob_df, ricb_df) frames of about `rows` rows each.
+
+    match_ratio of the RICBL rows get a BOB credit with the same amount and
+    date; policy_mismatch_ratio of those quote a different policy in the BOB
+    narration, so they match on amount but should be flagged by the fuzzy
+    check. Of the remaining rows, about split_ratio are grouped in threes: the
+    three RICBL rows share a scheme and date and one BOB credit pays their
+    total. Everything else on both sides has no counterpart.
+    """
+    rng = np.random.default_rng(seed)
+    matched = int(rows * match_ratio)
+
+    policies = _policies(rng, rows)
+    accounts = pd.Series(rng.integers(10**10, 10**11, rows)).astype(str)
+    amounts = rng.integers(100, 500_000, rows) / np.where(rng.random(rows) < 0.3, 100, 1)
+    amounts = np.round(amounts, 2)
+    # A month of dates, formatted once and picked by index
+    month = pd.date_range('2025-03-01', periods=31, freq='D')
+    days = rng.integers(0, len(month), rows)
+
+    # Split payment groups among the unmatched rows: one scheme and date per group
+    groups = np.arange(matched, rows - 2, 3)[:int((rows - matched) * split_ratio) // 3]
+    for first in groups.tolist():
+        scheme = policies[first].split('/')[0]
+        for row in (first + 1, first + 2):
+            policies[row] = scheme + policies[row][policies[row].index('/'):]
+            days[row] = days[first]
+
+    ricb_df = pd.DataFrame({
+        'ID#': pd.Series(np.arange(1_000_000, 1_000_000 + rows)).astype(str),
+        'POLICY/ ACCOUNT#': policies.where(rng.random(rows) < 0.5, policies + '/F'),
+        'CUSTOMER\nCID#': accounts,
+        'CUSTOMER\nNAME': NAMES[rng.integers(0, len(NAMES), rows)],
+        'DEPARTMENT': 'CID',
+        'AMOUNT': pd.Series(amounts).map('{:.2f}'.format),
+        'REMITTER\nACC#': pd.Series(rng.integers(10**8, 10**9, rows)).astype(str),
+        'TRANSACTION\nID': '',
+        'TRANSACTION\nDATE': np.asarray(month.strftime('%d/%m/%Y') + '\n08:11:58')[days],
+        'TRANSACTION\nSTATUS': 'SUCCESS',
+        'ERR LOG': '',
+        'JOURNAL\nNO': '',
+    }, columns=RICB_COLUMNS)
+
+    # BOB side: the first `matched` rows mirror RICBL rows, the rest are unrelated credits
+    bob_policies = policies.copy()
+    mismatched = rng.random(rows) < policy_mismatch_ratio
+    bob_policies[mismatched] = _policies(rng, int(mismatched.sum())).to_numpy()
+    bob_amounts = amounts.copy()
+    unmatched = np.arange(rows) >= matched
+    bob_amounts[unmatched] = np.round(rng.integers(100, 500_000, int(unmatched.sum())) + 0.37, 2)
+    bob_policies[unmatched] = _policies(rng, int(unmatched.sum())).to_numpy()
+
+    # Split payments: the first row of each group carries the BOB credit for the whole group
+    for first in groups.tolist():
+        bob_amounts[first] = round(amounts[first] + amounts[first + 1] + amounts[first + 2], 2)
+        bob_policies[first] = policies[first]
+
+    narrations = (
+        bob_policies + '/' + accounts.str[:8] + '\n' + accounts.str[8:] + '/'
+        + pd.Series(SUFFIXES[rng.integers(0, len(SUFFIXES), rows)])
+    )
+    other = unmatched & (rng.random(rows) < 0.3)
+    narrations[other] = (
+        pd.Series(OTHER_NARRATIONS[rng.integers(0, len(OTHER_NARRATIONS), int(other.sum()))])
+        + '/' + pd.Series(rng.integers(10**15, 10**16, int(other.sum()))).astype(str)
+    ).to_numpy()
+
+    bob_df = pd.DataFrame({
+        'SL.NO': pd.Series(np.arange(1, rows + 1)).astype(str),
+        'TXN DATE': np.asarray(month.strftime('%d-%m-%Y'))[days],
+        'JOURNAL NO': pd.Series(rng.integers(100_000, 999_999, rows)).astype(str),
+        'TRAN DESC': 'NO BOOK DEPOSIT TRANSFER',
+        'NARRATION': narrations,
+        'DEBIT': '',
+        'CREDIT': pd.Series(bob_amounts).map('{:,.2f}'.format),
+        'BALANCE': pd.Series(np.cumsum(bob_amounts) + 42_000_000).map('{:,.2f}'.format),
+    }, columns=BOB_COLUMNS)
+
+    # Statements are not in the same order
+    order = rng.permutation(rows)
+    return bob_df.iloc[order].reset_index(drop=True), ricb_df